@@ -1,10 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
 from dataclasses import dataclass, field
+from functools import lru_cache
 from importlib.resources import files
+from importlib.resources.abc import Traversable
 import asyncio
+import atexit
+import hashlib
+import json
+from operator import attrgetter
+import os
 from pathlib import Path
+from typing import AsyncIterator
 
+try:
+    # Optional faster TOML parser
+    from rtoml import loads as toml_loads
+except ImportError:
+    from tomllib import loads as toml_loads
+
+from toad import agent_schema, get_version
 from toad.agent_schema import Agent, ValidationError, validate_agent
-from toad.paths import get_config
+from toad.paths import get_cache, get_config
 
 
 class AgentReadError(Exception):
@@ -26,81 +43,252 @@ class AgentReadResult:
     agents: dict[str, Agent] = field(default_factory=dict)
     validation_errors: list[AgentValidationError] = field(default_factory=list)
 
+    def add(self, agent: Agent | AgentValidationError) -> None:
+        """Add an agent, replacing any previous agent with the same identity.
 
-async def read_agents() -> AgentReadResult:
-    """Read agent information from data/agents and <toad_config_path>/agents/
+        Args:
+            agent: An agent, or a validation error.
+        """
+        if isinstance(agent, AgentValidationError):
+            self.validation_errors.append(agent)
+        elif identity := agent.get("identity"):
+            self.agents[identity] = agent
+
+
+@lru_cache(maxsize=1)
+def get_builtin_agents_path() -> Traversable:
+    """Get the location of the built-in agents.
+
+    Returns:
+        A traversable for the data/agents directory.
+    """
+    return files("toad.data").joinpath("agents")
+
+
+def load_agent(file, validate: bool = False) -> Agent | None:
+    """Load an agent from a TOML file, returning None if inactive.
+
+    Args:
+        file: The file to load.
+        validate: If True, validate against the Agent schema.
+
+    Raises:
+        ValidationError: If validation is enabled and fails.
+    """
+    agent = toml_loads(file.read_text(encoding="utf-8"))
+    if not agent.get("active", True):
+        return None
+    if validate:
+        return validate_agent(agent, file)
+    return agent  # type: ignore[return-value]
+
+
+@lru_cache(maxsize=1)
+def read_builtin_agents() -> tuple[Agent, ...]:
+    """Read the built-in agents.
+
+    These ship with Toad and can't change while it is running, so they are read once.
+
+    Returns:
+        A tuple of active agents.
+    """
+    return tuple(
+        agent
+        for file in get_builtin_agents_path().iterdir()
+        if (agent := load_agent(file))
+    )
+
+
+@lru_cache(maxsize=1)
+def get_agent_schema_version() -> str:
+    """Get a version for the agent schema, used to invalidate the validation cache.
+
+    Combines the Toad version with a hash of the schema module, so the cache is
+    discarded when the schema changes (even without a version bump).
+
+    Returns:
+        A version string.
+    """
+    schema_hash = hashlib.blake2b(digest_size=8)
+    with suppress(OSError, TypeError):
+        schema_hash.update(Path(agent_schema.__file__).read_bytes())
+    return f"{get_version()}:{schema_hash.hexdigest()}"
+
+
+def save_agent_validation_cache(
+    path: Path, previously_validated: frozenset[str], validated: set[str]
+) -> None:
+    """Save the keys of custom agents which passed validation, if they have changed.
+
+    Args:
+        path: Path to the cache file.
+        previously_validated: Keys loaded from the cache.
+        validated: Keys validated in this run.
+    """
+    if validated != previously_validated:
+        cache = {"version": get_agent_schema_version(), "validated": sorted(validated)}
+        with suppress(OSError):
+            path.write_text(json.dumps(cache), encoding="utf-8")
+
+
+@lru_cache(maxsize=1)
+def get_agent_validation_cache() -> tuple[frozenset[str], set[str]]:
+    """Get the keys (path, modified time, and size) of custom agents which passed validation.
+
+    Keys validated in this run are saved when the process exits, so unchanged
+    agents need not be validated again. The cache is discarded if it was saved
+    by a different version of Toad or the agent schema.
+
+    Returns:
+        A tuple of keys validated in a previous run, and a set of keys validated in this run.
+    """
+    path = get_cache() / "agent-validation.json"
+    try:
+        cache = json.loads(path.read_text(encoding="utf-8"))
+        if cache["version"] != get_agent_schema_version():
+            raise ValueError("agent validation cache is out of date")
+        previously_validated = frozenset(cache["validated"])
+    except OSError, ValueError, TypeError, KeyError:
+        previously_validated = frozenset()
+    validated: set[str] = set()
+    atexit.register(save_agent_validation_cache, path, previously_validated, validated)
+    return previously_validated, validated
+
+
+_custom_agents: dict[str, tuple[tuple[int, int], Agent | None]] = {}
+"""Custom agents, keyed on path, with the modified time and size of the file."""
+
+
+def load_custom_agent(entry: os.DirEntry[str]) -> Agent | None:
+    """Load and validate a custom agent, re-using the previous result if the file is unchanged.
+
+    Args:
+        entry: Directory entry for the agent TOML.
+
+    Raises:
+        ValidationError: If the agent failed validation.
+
+    Returns:
+        An Agent, or `None` if the agent is inactive.
+    """
+    stat = entry.stat()
+    file_key = (stat.st_mtime_ns, stat.st_size)
+    if (cached := _custom_agents.get(entry.path)) is not None and cached[0] == file_key:
+        return cached[1]
+    previously_validated, validated = get_agent_validation_cache()
+    validation_key = f"{entry.path}:{stat.st_mtime_ns}:{stat.st_size}"
+    agent = load_agent(
+        Path(entry.path), validate=validation_key not in previously_validated
+    )
+    validated.add(validation_key)
+    _custom_agents[entry.path] = (file_key, agent)
+    return agent
+
+
+def read_custom_agent(entry: os.DirEntry[str]) -> Agent | AgentValidationError | None:
+    """Read a custom agent, reporting errors rather than raising them.
+
+    Args:
+        entry: Directory entry for the agent TOML.
+
+    Returns:
+        An Agent, an `AgentValidationError` if the agent couldn't be loaded,
+            or `None` if the agent is inactive.
+    """
+    try:
+        return load_custom_agent(entry)
+    except ValidationError as error:
+        return AgentValidationError(
+            file_path=Path(entry.path),
+            error_message=str(error),
+        )
+    except Exception as error:
+        return AgentValidationError(
+            file_path=Path(entry.path),
+            error_message=f"Failed to load agent: {error}",
+        )
+
+
+def scan_custom_agents() -> list[os.DirEntry[str]]:
+    """Find custom agent files in <toad_config_path>/agents/.
+
+    Returns:
+        Directory entries for agent TOML files, sorted by name so that overrides
+            are deterministic.
+    """
+    try:
+        with os.scandir(get_config() / "agents") as entries:
+            agent_files = sorted(
+                (
+                    entry
+                    for entry in entries
+                    if entry.name.endswith(".toml") and entry.is_file()
+                ),
+                key=attrgetter("name"),
+            )
+    except FileNotFoundError:
+        return []
+    if agent_files:
+        # Load before agents are read from multiple threads
+        get_agent_validation_cache()
+    return agent_files
+
+
+def get_max_workers() -> int:
+    """Get the number of threads used to read custom agents.
+
+    Returns:
+        Maximum number of worker threads.
+    """
+    return min(8, os.cpu_count() or 4)
+
+
+async def iter_agents() -> AsyncIterator[Agent | AgentValidationError]:
+    """Read agents, yielding each one as soon as it has loaded.
+
+    Built-in agents are yielded first, followed by custom agents (and validation
+    errors) in file name order. Later agents override earlier agents with the
+    same identity.
 
     Raises:
         AgentReadError: If the built-in agents could not be read.
 
     Returns:
-        AgentReadResult containing valid agents and any validation errors from custom agents.
+        An async iterator of agents, or validation errors.
     """
-    import tomllib
+    try:
+        builtin_agents = await asyncio.to_thread(read_builtin_agents)
+    except Exception as error:
+        raise AgentReadError(f"Failed to read built-in agents; {error}")
+    for agent in builtin_agents:
+        yield agent
 
-    def load_agent(file, validate: bool = False) -> Agent | None:
-        """Load an agent from a TOML file, returning None if inactive.
+    if not (agent_files := await asyncio.to_thread(scan_custom_agents)):
+        return
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=get_max_workers())
+    try:
+        futures = [
+            loop.run_in_executor(executor, read_custom_agent, entry)
+            for entry in agent_files
+        ]
+        for future in futures:
+            if (agent := await future) is not None:
+                yield agent
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
-        Args:
-            file: The file to load.
-            validate: If True, validate against the Agent schema.
 
-        Raises:
-            ValidationError: If validation is enabled and fails.
-        """
-        with file.open("rb") as f:
-            agent = tomllib.load(f)
-            if not agent.get("active", True):
-                return None
-            if validate:
-                return validate_agent(agent, file)
-            return agent  # type: ignore[return-value]
-
-    def read_agents() -> AgentReadResult:
-        """Read agent information.
-
-        Loads built-in agents from data/agents, then custom agents from
-        <toad_config_path>/agents/. Custom agents with the same identity
-        will override built-in ones.
-
-        Returns:
-            AgentReadResult with valid agents and validation errors.
-        """
-        result = AgentReadResult()
-
-        def add_agent(agent: Agent) -> None:
-            identity = agent.get("identity")
-            if identity:
-                result.agents[identity] = agent
-
-        try:
-            for file in files("toad.data").joinpath("agents").iterdir():
-                if agent := load_agent(file):
-                    add_agent(agent)
-        except Exception as error:
-            raise AgentReadError(f"Failed to read built-in agents; {error}")
-
-        custom_agents_dir = get_config() / "agents"
-        if custom_agents_dir.exists():
-            for file in custom_agents_dir.glob("*.toml"):
-                try:
-                    if agent := load_agent(file, validate=True):
-                        add_agent(agent)
-                except ValidationError as error:
-                    result.validation_errors.append(
-                        AgentValidationError(
-                            file_path=file,
-                            error_message=str(error),
-                        )
-                    )
-                except Exception as error:
-                    result.validation_errors.append(
-                        AgentValidationError(
-                            file_path=file,
-                            error_message=f"Failed to load agent: {error}",
-                        )
-                    )
-
-        return result
-
-    return await asyncio.to_thread(read_agents)
+async def read_agents() -> AgentReadResult:
+    """Read agent information from data/agents and <toad_config_path>/agents/
+
+    Raises:
+        AgentReadError: If the built-in agents could not be read.
+
+    Returns:
+        AgentReadResult containing valid agents and any validation errors from custom agents.
+    """
+    result = AgentReadResult()
+    async for agent in iter_agents():
+        result.add(agent)
+    return result
@@ -1,35 +1,38 @@
 from __future__ import annotations
 
-import io
+from bisect import bisect_right
 from itertools import accumulate
+from operator import attrgetter
+import re as stdlib_re  # re2 re-encodes the whole string when searching from an offset
 import re2 as re
 
 from dataclasses import dataclass, field
 from functools import lru_cache
-from typing import Any, Awaitable, Callable, Iterable, Literal, Mapping, NamedTuple
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ClassVar,
+    Iterable,
+    Literal,
+    Mapping,
+    NamedTuple,
+)
 
 import rich.repr
 
-from textual import events
+from textual import events, log
 from textual.color import Color
-from textual.content import Content, EMPTY_CONTENT
+from textual.content import Content, EMPTY_CONTENT, Span
 from textual.geometry import clamp
 from textual.style import Style, NULL_STYLE
 
-from toad.ansi._ansi_colors import ANSI_COLORS
+from toad.ansi._ansi_colors import ANSI_BACKGROUND_STYLES, ANSI_FOREGROUND_STYLES
 from toad.ansi._keys import TERMINAL_KEY_MAP, CURSOR_KEYS_APPLICATION
 from toad.ansi._control_codes import CONTROL_CODES
-from toad.ansi._sgr_styles import SGR_STYLES
-from toad.ansi._stream_parser import (
-    StreamParser,
-    SeparatorToken,
-    PatternToken,
-    Pattern,
-    PatternCheck,
-    ParseResult,
-    Token,
-)
+from toad.ansi._sgr_styles import SGR_SEQUENCE_STYLES, SGR_STYLE_TABLE
 
+from toad.constants import DEBUG
 from toad.dec import CHARSET_MAP
 
 
@@ -47,7 +50,7 @@ def character_range(start: int, end: int) -> frozenset:
 
 
 class ANSIToken:
-    pass
+    __slots__ = ()
 
 
 class DEC(NamedTuple):
@@ -69,97 +72,113 @@ def show(obj: object) -> object:
     return obj
 
 
-class FEPattern(Pattern):
-    FINAL = character_range(0x30, 0x7E)
-    INTERMEDIATE = character_range(0x20, 0x2F)
-    CSI_TERMINATORS = character_range(0x40, 0x7E)
-    OSC_TERMINATORS = frozenset({"\x07", "\x9c"})
-    DSC_TERMINATORS = frozenset({"\x9c"})
-
-    def check(self) -> PatternCheck:
-        sequence = io.StringIO()
-        store = sequence.write
-        store(character := (yield))
-
-        match character:
-            # CSI
-            case "[":
-                CSI_TERMINATORS = self.CSI_TERMINATORS
-                while (character := (yield)) not in CSI_TERMINATORS:
-                    store(character)
-                store(character)
-                return ("csi", sequence.getvalue())
-
-            # OSC
-            case "]":
-                last_character = ""
-                OSC_TERMINATORS = self.OSC_TERMINATORS
-                while (character := (yield)) not in OSC_TERMINATORS:
-                    store(character)
-                    if last_character == "\x1b" and character in {"\\", "\0x5c"}:
-                        break
-                    last_character = character
-                store(character)
-
-                return ("osc", sequence.getvalue())
-
-            # DCS
-            case "P":
-                print("TODO DCS")
-                last_character = ""
-                DSC_TERMINATORS = self.DSC_TERMINATORS
-                while (character := (yield)) not in DSC_TERMINATORS:
-                    store(character)
-                    if last_character == "\x1b" and character == "\\":
-                        break
-                    last_character = character
-                store(character)
-                return ("dcs", sequence.getvalue())
-
-            # Character set designation
-            case "(" | ")" | "*" | "+" | "-" | "." | "/":
-                if (character := (yield)) not in self.FINAL:
-                    return False
-                store(character)
-                return ("dec", sequence.getvalue())
-
-            case "n" | "o" | "~" | "}" | "|" | "N" | "O":
-                return ("dec_invoke", sequence.getvalue())
-
-            # Line attribute
-            case "#":
-                print("LINE ATTRIBUTES")
-                store((yield))
-                return ("la", sequence.getvalue())
-            # ISO 2022: ESC SP
-            case " ":
-                store((yield))
-                return ("sp", sequence.getvalue())
-            case _:
-                return ("control", character)
-
-
-class ANSIParser(StreamParser[tuple[str, str]]):
-    """Parse a stream of text containing escape sequences in to logical tokens."""
-
-    def parse(self) -> ParseResult[tuple[str, str]]:
-        NEW_LINE = "\n"
-        CARRIAGE_RETURN = "\r"
-        ESCAPE = "\x1b"
-        BACKSPACE = "\x08"
-
-        while True:
-            token = yield self.read_until(NEW_LINE, CARRIAGE_RETURN, ESCAPE, BACKSPACE)
-            if isinstance(token, SeparatorToken):
-                if token.text == ESCAPE:
-                    token = yield self.read_patterns("\x1b", fe=FEPattern())
-                    if isinstance(token, PatternToken):
-                        yield token.value
-                else:
-                    yield "separator", token.text
-                continue
+ANSI_TOKEN = stdlib_re.compile(
+    r"([^\n\r\x1b\x08]+)|([\n\r\x08])"
+    r"|\x1b(?:"
+    # CSI
+    r"(\[[^@-~]*[@-~])"
+    # OSC body, which may contain an ESC not followed by a backslash, then BEL, ST, or ESC backslash
+    r"|(\][^\x07\x9c\x1b]*(?:\x1b(?!\\)[^\x07\x9c\x1b]*)*)(?:\x07|\x9c|\x1b\\)"
+    # DCS, then ST or ESC backslash
+    r"|(P[^\x9c\x1b]*(?:\x1b(?!\\)[^\x9c\x1b]*)*)(?:\x9c|\x1b\\)"
+    # Character set designation
+    r"|([()*+\-./][0-~])"
+    # Character set invocation
+    r"|([no~}|NO])"
+    # Line attribute
+    r"|(#(?s:.))"
+    # ISO 2022: ESC SP
+    r"|( (?s:.))"
+    # Invalid character set designation (ignored)
+    r"|[()*+\-./](?s:.)"
+    # Any other character (excluding the start of the sequences above)
+    r"|([^\[\]P()*+\-./# ])"
+    r")"
+)
+"""Matches a token at the current position. The group which matched gives the
+token type (see `ANSI_TOKEN_TYPES`). There is no match if an escape sequence is
+incomplete."""
+
+ANSI_TOKEN_TYPES = (
+    "",
+    "content",
+    "separator",
+    "csi",
+    "osc",
+    "dcs",
+    "dec",
+    "dec_invoke",
+    "la",
+    "sp",
+    "control",
+)
+"""Token type, indexed by the group matched in `ANSI_TOKEN`."""
+
+SEPARATOR_TOKENS = {separator: ("separator", separator) for separator in "\n\r\x08"}
+"""Separator tokens, which are created once as they are so frequent."""
+
+STRING_SEQUENCES = frozenset({"]", "P"})
+"""Characters which follow ESC to start a sequence ended by a string terminator."""
+
+
+class ANSIParser:
+    """Parse a stream of text containing escape sequences in to logical tokens.
+
+    Tokens are matched with a regular expression. If an escape sequence is split
+    over calls to `feed`, the start is held back and matched again with the next text.
+
+    """
 
-            yield "content", token.text
+    __slots__ = ["_partial_sequence"]
+
+    def __init__(self) -> None:
+        self._partial_sequence: list[str] = []
+        """The start of an escape sequence from previous feeds."""
+
+    @property
+    def has_partial_sequence(self) -> bool:
+        """Is the start of an escape sequence held back from a previous feed?"""
+        return bool(self._partial_sequence)
+
+    def feed(self, text: str) -> Iterable[tuple[str, str]]:
+        """Feed text in to the parser.
+
+        Args:
+            text: Text from stream.
+
+        Returns:
+            A generator of tokens.
+        """
+        if partial_sequence := self._partial_sequence:
+            if (
+                partial_sequence[0][1:2] in STRING_SEQUENCES
+                and "\x1b" not in text
+                and "\x07" not in text
+                and "\x9c" not in text
+                and not (
+                    text.startswith("\\") and partial_sequence[-1].endswith("\x1b")
+                )
+            ):
+                # A long OSC or DCS sequence with no terminator yet, which doesn't
+                # need to be matched again until it may be complete.
+                partial_sequence.append(text)
+                return
+            partial_sequence.append(text)
+            text = "".join(partial_sequence)
+            self._partial_sequence = []
+        position = 0
+        text_length = len(text)
+        match_token = ANSI_TOKEN.match
+        while position < text_length:
+            if (token_match := match_token(text, position)) is None:
+                # Sequence continues in the next feed
+                self._partial_sequence = [text[position:]]
+                break
+            if (group := token_match.lastindex) == 2:
+                yield SEPARATOR_TOKENS[token_match.group(2)]
+            elif group is not None:
+                yield (ANSI_TOKEN_TYPES[group], token_match.group(group))
+            position = token_match.end()
 
 
 EMPTY_LINE = Content()
@@ -238,6 +257,15 @@ class ANSICursor(NamedTuple):
             "Only call this if the replace attribute has a value"
         )
         replace_start, replace_end = self.clear_range
+        if not self.relative:
+            # Erase in line (EL) shapes
+            if replace_end == -1:
+                if replace_start is None:
+                    return (cursor_offset, line_length - 1)
+                if replace_start == 0:
+                    return (0, line_length - 1)
+            elif replace_start == 0 and replace_end is None:
+                return (0, cursor_offset)
         if replace_start is None:
             replace_start = cursor_offset
         if replace_end is None:
@@ -256,6 +284,14 @@ class ANSICursor(NamedTuple):
 class ANSINewLine:
     """New line (diffrent in alternate buffer)"""
 
+    __slots__ = ()
+
+
+NEW_LINE = ANSICursor(delta_y=+1, absolute_x=0)
+"""Cursor movement for a new line."""
+ALTERNATE_NEW_LINE = ANSICursor(delta_y=+1, auto_scroll=True)
+"""Cursor movement for a new line in the alternate screen."""
+
 
 @rich.repr.auto
 class ANSIStyle(NamedTuple):
@@ -366,51 +402,221 @@ type ANSICommand = (
 )
 
 
+SGR_RESET = frozenset({"[m", "[0m"})
+"""The most common SGR sequences, which reset the style."""
+
+
+@lru_cache(maxsize=64)
+def link_style(link: str | None) -> Style:
+    """Get a style with a hyperlink (OSC 8).
+
+    Args:
+        link: The link URL, or `None` to end a link.
+
+    Returns:
+        A Style.
+    """
+    return Style(link=link)
+
+
+@lru_cache(maxsize=4096)
+def foreground_rgb(red: int, green: int, blue: int) -> Style:
+    """Get a style with a truecolor foreground.
+
+    Args:
+        red: Red component.
+        green: Green component.
+        blue: Blue component.
+
+    Returns:
+        A Style.
+    """
+    return Style(foreground=Color(red, green, blue))
+
+
+@lru_cache(maxsize=4096)
+def background_rgb(red: int, green: int, blue: int) -> Style:
+    """Get a style with a truecolor background.
+
+    Args:
+        red: Red component.
+        green: Green component.
+        blue: Blue component.
+
+    Returns:
+        A Style.
+    """
+    return Style(background=Color(red, green, blue))
+
+
+@lru_cache(maxsize=4096)
+def parse_sgr(csi: str) -> Style | None:
+    """Parse a SGR (Select Graphics Rendition) CSI sequence in to a Style instance,
+    or `None` to indicate a reset.
+
+    Args:
+        csi: CSI sequence (without the escape), ending with "m".
+
+    Returns:
+        A Visual Style, or `None`.
+    """
+    parameters = csi[1:-1].split(";")
+    try:
+        codes = tuple(map(int, parameters))
+    except ValueError:
+        # Empty parameters default to 0
+        codes = tuple(int(parameter) if parameter else 0 for parameter in parameters)
+    if max(codes) > 255:
+        codes = tuple(code if code < 255 else 255 for code in codes)
+    return parse_sgr_codes(codes)
+
+
+@lru_cache(maxsize=4096)
+def parse_sgr_codes(sgr_codes: tuple[int, ...]) -> Style | None:
+    """Parse SGR codes in to a Style instance, or `None` to indicate a reset.
+
+    Args:
+        sgr_codes: SGR codes.
+
+    Returns:
+        A Visual Style, or `None`.
+    """
+    codes = sgr_codes
+    code_count = len(codes)
+    style_table = SGR_STYLE_TABLE
+    style = NULL_STYLE
+    index = 0
+    while index < code_count:
+        code = codes[index]
+        index += 1
+        if code == 38 or code == 48:
+            color_type = codes[index] if index < code_count else None
+            if color_type == 2 and index + 4 <= code_count:
+                # Foreground / background RGB
+                red, green, blue = codes[index + 1 : index + 4]
+                index += 4
+                if code == 38:
+                    style += foreground_rgb(red, green, blue)
+                else:
+                    style += background_rgb(red, green, blue)
+                continue
+            if color_type == 5 and index + 2 <= code_count:
+                # Foreground / background ANSI
+                ansi_color = codes[index + 1]
+                index += 2
+                if code == 38:
+                    style += ANSI_FOREGROUND_STYLES[ansi_color]
+                else:
+                    style += ANSI_BACKGROUND_STYLES[ansi_color]
+                continue
+        elif code == 0:
+            # reset
+            return None
+        if code >= 0 and (sgr_style := style_table[code]):
+            style += sgr_style
+
+    return style
+
+
+CSI_PATTERN = re.compile(r"\[(?:(\d+)?;?(\d*)(\w)|([0-9:;<=>?]*)([!-/]*)([@-~]))")
+"""Matches a CSI sequence (use with `fullmatch`).
+
+Groups 1-3 are set for a sequence with up to two numeric parameters, otherwise
+groups 4-6 are set with the parameters, intermediates, and final character.
+"""
+
+MOUSE_MODES: Mapping[str, tuple[str, object, object]] = {
+    "1000": ("mode", "button", "none"),
+    "1002": ("mode", "drag", "none"),
+    "1003": ("mode", "all", "none"),
+    "1006": ("format", "sgr", "sgr"),
+    "1015": ("format", "urxvt", "urxvt"),
+    "1004": ("focus_events", True, False),
+    "1007": ("alternate_scroll", True, False),
+}
+"""Private modes which set mouse tracking, mapped on to the `ANSIMouseTracking`
+field, and its value when the mode is enabled and disabled."""
+
+MODE_CHARACTERS = frozenset("0123456789;")
+"""Characters in the parameters of a private mode CSI (after the "?")."""
+
+CURSOR_MOVES = 33
+"""Number of cursor movements which are created in advance, for each direction."""
+
+CURSOR_UP = tuple(ANSICursor(delta_y=-lines) for lines in range(CURSOR_MOVES))
+CURSOR_DOWN = tuple(ANSICursor(delta_y=+lines) for lines in range(CURSOR_MOVES))
+CURSOR_FORWARD = tuple(ANSICursor(delta_x=+cells) for cells in range(CURSOR_MOVES))
+CURSOR_BACK = tuple(ANSICursor(delta_x=-cells) for cells in range(CURSOR_MOVES))
+
+
+def cursor_up(lines: str, _: str) -> ANSICursor:
+    """CUU - Cursor Up: ESC[nA"""
+    count = int(lines or 1)
+    return CURSOR_UP[count] if count < CURSOR_MOVES else ANSICursor(delta_y=-count)
+
+
+def cursor_down(lines: str, _: str) -> ANSICursor:
+    """CUD - Cursor Down: ESC[nB"""
+    count = int(lines or 1)
+    return CURSOR_DOWN[count] if count < CURSOR_MOVES else ANSICursor(delta_y=+count)
+
+
+def cursor_forward(cells: str, _: str) -> ANSICursor:
+    """CUF - Cursor Forward: ESC[nC"""
+    count = int(cells or 1)
+    return CURSOR_FORWARD[count] if count < CURSOR_MOVES else ANSICursor(delta_x=+count)
+
+
+def cursor_back(cells: str, _: str) -> ANSICursor:
+    """CUB - Cursor Back: ESC[nD"""
+    count = int(cells or 1)
+    return CURSOR_BACK[count] if count < CURSOR_MOVES else ANSICursor(delta_x=-count)
+
+
+CSI_HANDLERS: Mapping[str, Callable[[str, str], ANSICommand]] = {
+    "A": cursor_up,
+    "B": cursor_down,
+    "C": cursor_forward,
+    "D": cursor_back,
+    # CNL - Cursor Next Line: ESC[nE
+    "E": lambda lines, _: ANSICursor(absolute_x=0, delta_y=+int(lines or 1)),
+    # CPL - Cursor Previous Line: ESC[nF
+    "F": lambda lines, _: ANSICursor(absolute_x=0, delta_y=-int(lines or 1)),
+    # CHA - Cursor Horizontal Absolute: ESC[nG
+    "G": lambda cells, _: ANSICursor(absolute_x=+int(cells or 1) - 1),
+    # CUP - Cursor Position: ESC[n;mH
+    "H": lambda row, column: ANSICursor(
+        absolute_x=int(column or 1) - 1, absolute_y=int(row or 1) - 1
+    ),
+    # HVP - Horizontal Vertical Position: ESC[n;mf
+    "f": lambda row, column: ANSICursor(
+        absolute_x=int(column or 1) - 1, absolute_y=int(row or 1) - 1
+    ),
+    "P": lambda characters, _: ANSICursor(
+        clear_range=(0, int(characters or 1) - 1), relative=True, erase=True
+    ),
+    "S": lambda lines, _: ANSIScroll(-1, int(lines)),
+    "T": lambda lines, _: ANSIScroll(+1, int(lines)),
+    # VPA - Vertical Position Absolute: ESC[nd
+    "d": lambda row, _: ANSICursor(absolute_y=int(row or 1) - 1),
+    "X": lambda characters, _: ANSICursor(
+        clear_range=(0, int(characters or 1) - 1), relative=True, erase=False
+    ),
+    "r": lambda top, bottom: ANSIScrollMargin(
+        int(top or "1") - 1 if top else None,
+        int(bottom or "1") - 1 if top else None,
+    ),
+}
+"""Handlers for CSI sequences with numeric parameters, keyed on the final character."""
+
+
 class ANSIStream:
     def __init__(self) -> None:
         self.parser = ANSIParser()
         self.style = NULL_STYLE
         self.show_cursor = True
-
-    @classmethod
-    @lru_cache(maxsize=1024)
-    def _parse_sgr(cls, sgr: str) -> Style | None:
-        """Parse a SGR (Select Graphics Rendition) code in to a Style instance,
-        or `None` to indicate a reset.
-
-        Args:
-            sgr: SGR sequence.
-
-        Returns:
-            A Visual Style, or `None`.
-        """
-        codes = [
-            code if code < 255 else 255
-            for code in map(int, [sgr_code or "0" for sgr_code in sgr.split(";")])
-        ]
-        style = NULL_STYLE
-        while codes:
-            match codes:
-                case [38, 2, red, green, blue, *codes]:
-                    # Foreground RGB
-                    style += Style(foreground=Color(red, green, blue))
-                case [48, 2, red, green, blue, *codes]:
-                    # Background RGB
-                    style += Style(background=Color(red, green, blue))
-                case [38, 5, ansi_color, *codes]:
-                    # Foreground ANSI
-                    style += Style(foreground=ANSI_COLORS[ansi_color])
-                case [48, 5, ansi_color, *codes]:
-                    # Background ANSI
-                    style += Style(background=ANSI_COLORS[ansi_color])
-                case [0, *codes]:
-                    # reset
-                    return None
-                case [code, *codes]:
-                    if sgr_style := SGR_STYLES.get(code):
-                        style += sgr_style
-
-        return style
+        self._output_style = NULL_STYLE
+        """The style in the last ANSIStyle command from `feed`."""
 
     def feed(self, text: str) -> Iterable[ANSICommand]:
         """Feed text potentially containing ANSI sequences, and parse in to
@@ -423,9 +629,66 @@ class ANSIStream:
             `ANSICommand` instances.
         """
 
+        if (
+            "\x1b" not in text
+            and "\n" not in text
+            and "\r" not in text
+            and "\x08" not in text
+            and not self.parser.has_partial_sequence
+        ):
+            # Plain text needn't go through the parser
+            if text:
+                yield ANSIContent(text)
+            return
+
+        separators = self.ANSI_SEPARATORS
+        on_token = self.on_token
+        update_style = self._update_style
+        # Content is combined until there is a command which affects it
+        text_run: list[str] = []
         for token in self.parser.feed(text):
-            if not isinstance(token, Token):
-                yield from self.on_token(token)
+            # The most common tokens are handled here, rather than in on_token
+            kind, value = token
+            if kind == "content":
+                text_run.append(value)
+                continue
+            if kind == "separator":
+                command = ANSINewLine() if value == "\n" else separators[value]
+            elif kind == "csi" and value.endswith("m"):
+                command = update_style(value)
+                if command.style == self._output_style:
+                    continue
+                self._output_style = command.style
+            else:
+                if not (commands := list(on_token(token))):
+                    continue
+                if text_run:
+                    yield ANSIContent("".join(text_run))
+                    text_run.clear()
+                yield from commands
+                continue
+            if text_run:
+                yield ANSIContent("".join(text_run))
+                text_run.clear()
+            yield command
+        if text_run:
+            yield ANSIContent("".join(text_run))
+
+    def feed_all(self, text: str) -> list[ANSICommand]:
+        """Parse a complete text (rather than a chunk from a stream) in to ansi commands.
+
+        An incomplete escape sequence at the end of the text is discarded, rather than
+        held back for the next call.
+
+        Args:
+            text: Text containing ANSI sequences.
+
+        Returns:
+            A list of `ANSICommand` instances.
+        """
+        commands = list(self.feed(text))
+        self.parser = ANSIParser()
+        return commands
 
     ANSI_SEPARATORS = {
         "\n": ANSICursor(delta_y=+1, absolute_x=0),
@@ -476,6 +739,38 @@ class ANSIStream:
         "O": SHIFT_G3,
     }
 
+    CSI_COMMANDS: ClassVar[Mapping[tuple[str, str], ANSICommand]] = {
+        ("", "J"): CLEAR_SCREEN_CURSOR_TO_END,
+        ("0", "J"): CLEAR_SCREEN_CURSOR_TO_END,
+        ("1", "J"): CLEAR_SCREEN_CURSOR_TO_BEGINNING,
+        ("2", "J"): CLEAR_SCREEN,
+        ("3", "J"): CLEAR_SCREEN_SCROLLBACK,
+        ("", "K"): CLEAR_LINE_CURSOR_TO_END,
+        ("0", "K"): CLEAR_LINE_CURSOR_TO_END,
+        ("1", "K"): CLEAR_LINE_CURSOR_TO_BEGINNING,
+        ("2", "K"): CLEAR_LINE,
+        ("4", "h"): ENABLE_REPLACE_MODE,
+        ("4", "l"): DISABLE_REPLACE_MODE,
+        ("6", "n"): ANSICursorPositionRequest(),
+    }
+    """CSI commands with a fixed first parameter, keyed on (parameter, final)."""
+
+    CSI_SEQUENCES: ClassVar[Mapping[str, ANSICommand]] = {
+        "[?25h": SHOW_CURSOR,
+        "[?25l": HIDE_CURSOR,
+        "[?1049h": ENABLE_ALTERNATE_SCREEN,
+        "[?1049l": DISABLE_ALTERNATE_SCREEN,
+        "[?2004h": ENABLE_BRACKETED_PASTE,
+        "[?2004l": DISABLE_BRACKETED_PASTE,
+        "[?12h": ENABLE_CURSOR_BLINK,
+        "[?12l": DISABLE_CURSOR_BLINK,
+        "[?1h": ENABLE_CURSOR_KEYS_APPLICATION_MODE,
+        "[?1l": DISABLE_CURSOR_KEYS_APPLICATION_MODE,
+        "[?7h": ENABLE_AUTO_WRAP,
+        "[?7l": DISABLE_AUTO_WRAP,
+    }
+    """CSI commands, keyed on the complete sequence (without the escape)."""
+
     @classmethod
     @lru_cache(maxsize=1024)
     def _parse_csi(cls, csi: str) -> ANSICommand | None:
@@ -488,217 +783,136 @@ class ANSIStream:
             Ansi segment, or `None` if one couldn't be decoded.
         """
 
-        if match := re.fullmatch(r"\[(\d+)?(?:;)?(\d*)?(\w)", csi):
-            match_groups = match.groups(default="")
-            match match_groups:
-                case [lines, _, "A"]:
-                    # CUU - Cursor Up: ESC[nA
-                    return ANSICursor(delta_y=-int(lines or 1))
-                case [lines, _, "B"]:
-                    # CUD - Cursor Down: ESC[nB
-                    return ANSICursor(delta_y=+int(lines or 1))
-                case [cells, _, "C"]:
-                    # CUF - Cursor Forward: ESC[nC
-                    return ANSICursor(delta_x=+int(cells or 1))
-                case [cells, _, "D"]:
-                    # CUB - Cursor Back: ESC[nD
-                    return ANSICursor(delta_x=-int(cells or 1))
-                case [lines, _, "E"]:
-                    # CNL - Cursor Next Line: ESC[nE
-                    return ANSICursor(absolute_x=0, delta_y=+int(lines or 1))
-                case [lines, _, "F"]:
-                    # CPL - Cursor Previous Line: ESC[nF
-                    return ANSICursor(absolute_x=0, delta_y=-int(lines or 1))
-                case [cells, _, "G"]:
-                    # CHA - Cursor Horizontal Absolute: ESC[nG
-                    return ANSICursor(absolute_x=+int(cells or 1) - 1)
-                case [row, column, "H" | "f"]:
-                    # CUP - Cursor Position: ESC[n;mH
-                    # HVP - Horizontal Vertical Position: ESC[n;mf
-                    return ANSICursor(
-                        absolute_x=int(column or 1) - 1,
-                        absolute_y=int(row or 1) - 1,
-                    )
-                case [characters, _, "P"]:
-                    return ANSICursor(
-                        clear_range=(0, int(characters or 1) - 1),
-                        relative=True,
-                        erase=True,
-                    )
-                case [lines, _, "S"]:
-                    return ANSIScroll(-1, int(lines))
-                case [lines, _, "T"]:
-                    return ANSIScroll(+1, int(lines))
-                case [row, _, "d"]:
-                    # VPA - Vertical Position Absolute: ESC[nd
-                    return ANSICursor(absolute_y=int(row or 1) - 1)
-                case [characters, _, "X"]:
-                    return ANSICursor(
-                        clear_range=(0, int(characters or 1) - 1),
-                        relative=True,
-                        erase=False,
-                    )
-                case ["0" | "", _, "J"]:
-                    return cls.CLEAR_SCREEN_CURSOR_TO_END
-                case ["1", _, "J"]:
-                    return cls.CLEAR_SCREEN_CURSOR_TO_BEGINNING
-                case ["2", _, "J"]:
-                    return cls.CLEAR_SCREEN
-                case ["3", _, "J"]:
-                    return cls.CLEAR_SCREEN_SCROLLBACK
-                case ["0" | "", _, "K"]:
-                    return cls.CLEAR_LINE_CURSOR_TO_END
-                case ["1", _, "K"]:
-                    return cls.CLEAR_LINE_CURSOR_TO_BEGINNING
-                case ["2", _, "K"]:
-                    return cls.CLEAR_LINE
-                case [top, bottom, "r"]:
-                    return ANSIScrollMargin(
-                        int(top or "1") - 1 if top else None,
-                        int(bottom or "1") - 1 if top else None,
-                    )
-                case ["4", _, "h" | "l" as replace_mode]:
-                    return (
-                        cls.ENABLE_REPLACE_MODE
-                        if replace_mode == "h"
-                        else cls.DISABLE_REPLACE_MODE
+        if (command := cls.CSI_SEQUENCES.get(csi)) is not None:
+            return command
+        if (match := CSI_PATTERN.fullmatch(csi)) is None:
+            if DEBUG:
+                log.debug("Unknown CSI (c)", repr(csi))
+            return None
+        parameter1, parameter2, final, parameters, intermediates, private_final = (
+            match.groups(default="")
+        )
+        if final:
+            if (command := cls.CSI_COMMANDS.get((parameter1, final))) is not None:
+                return command
+            if (handler := CSI_HANDLERS.get(final)) is not None:
+                return handler(parameter1, parameter2)
+            if DEBUG:
+                log.debug("Unknown CSI (a)", repr(csi))
+            return None
+
+        if private_final == "t":
+            # \x1b[22;0;0t
+            # 't' = XTWINOPS (Window manipulation)
+            if DEBUG:
+                log.debug("TODO", "XTWINOPS", parameters, intermediates)
+            return None
+        if (
+            private_final in ("h", "l")
+            and not intermediates
+            and parameters.startswith("?")
+            and len(parameters) > 1
+            and MODE_CHARACTERS.issuperset(parameters[1:])
+        ):
+            modes = parameters[1:].split(";")
+            enable = private_final == "h"
+            mouse_tracking: dict[str, object] = {}
+            for mode in modes:
+                if (mouse_mode := MOUSE_MODES.get(mode)) is not None:
+                    field_name, enabled_value, disabled_value = mouse_mode
+                    mouse_tracking[field_name] = (
+                        enabled_value if enable else disabled_value
                     )
-
-                case ["6", _, "n"]:
-                    return ANSICursorPositionRequest()
-
-                case _:
-                    print("Unknown CSI (a)", repr(csi))
-                    return None
-
-        elif match := re.fullmatch(r"\[([0-9:;<=>?]*)([!-/]*)([@-~])", csi):
-            match match.groups(default=""):
-                case ["?25", "", "h"]:
-                    return cls.SHOW_CURSOR
-                case ["?25", "", "l"]:
-                    return cls.HIDE_CURSOR
-                case ["?1049", "", "h"]:
-                    return cls.ENABLE_ALTERNATE_SCREEN
-                case ["?1049", "", "l"]:
-                    return cls.DISABLE_ALTERNATE_SCREEN
-                case ["?2004", "", "h"]:
-                    return cls.ENABLE_BRACKETED_PASTE
-                case ["?2004", "", "l"]:
-                    return cls.DISABLE_BRACKETED_PASTE
-                case ["?12", "", "h"]:
-                    return cls.ENABLE_CURSOR_BLINK
-                case ["?12", "", "l"]:
-                    return cls.DISABLE_CURSOR_BLINK
-                case ["?1", "", "h"]:
-                    return cls.ENABLE_CURSOR_KEYS_APPLICATION_MODE
-                case ["?1", "", "l"]:
-                    return cls.DISABLE_CURSOR_KEYS_APPLICATION_MODE
-                case ["?7", "", "h"]:
-                    return cls.ENABLE_AUTO_WRAP
-                case ["?7", "", "l"]:
-                    return cls.DISABLE_AUTO_WRAP
-
-                # \x1b[22;0;0t
-                case [param1, param2, "t"]:
-                    print("TODO", "XTWINOPS", param1, param2)
-                    # 't' = XTWINOPS (Window manipulation)
-                    return None
-                case _:
-                    if match := re.fullmatch(r"\[\?([0-9;]+)([hl])", csi):
-                        modes = [m for m in match.group(1).split(";")]
-                        enable = match.group(2) == "h"
-                        tracking: Literal["none"] | MOUSE_TRACKING_MODES | None = None
-                        format: MOUSE_FORMAT | None = None
-                        focus_events: bool | None = None
-                        alternate_scroll: bool | None = None
-                        for mode in modes:
-                            if mode == "1000":
-                                tracking = "button" if enable else "none"
-                            elif mode == "1002":
-                                tracking = "drag" if enable else "none"
-                            elif mode == "1003":
-                                tracking = "all" if enable else "none"
-                            elif mode == "1006":
-                                format = "sgr"
-                            elif mode == "1015":
-                                format = "urxvt"
-                            elif mode == "1004":
-                                focus_events = enable
-                            elif mode == "1007":
-                                alternate_scroll = enable
-                        return ANSIMouseTracking(
-                            mode=tracking,
-                            format=format,
-                            focus_events=focus_events,
-                            alternate_scroll=alternate_scroll,
-                        )
-                    else:
-                        print("Unknown CSI (b)", repr(csi))
-                        return None
-
-        print("Unknown CSI (c)", repr(csi))
+            return ANSIMouseTracking(**mouse_tracking)  # type: ignore[arg-type]
+        if DEBUG:
+            log.debug("Unknown CSI (b)", repr(csi))
         return None
 
-    def on_token(self, token: tuple[str, str]) -> Iterable[ANSICommand]:
-        match token:
-            case ["separator", separator]:
-                if separator == "\n":
-                    yield ANSINewLine()
-                else:
-                    yield self.ANSI_SEPARATORS[separator]
-
-            case ["osc", osc]:
-                match osc[1:].split(";"):
-                    case ["8", *_, link]:
-                        self.style += Style(link=link or None)
-                    case ["2025", current_directory, *_]:
-                        self.current_directory = current_directory
-                        yield ANSIWorkingDirectory(current_directory)
-
-            case ["csi", csi]:
-                if csi.endswith("m"):
-                    if (sgr_style := self._parse_sgr(csi[1:-1])) is None:
-                        self.style = NULL_STYLE
-                    else:
-                        self.style += sgr_style
-                        # Special case to use widget background rather
-                        # than theme background
-                        if (
-                            sgr_style.background is not None
-                            and sgr_style.background.ansi == -1
-                        ):
-                            self.style = (
-                                Style(foreground=self.style.foreground)
-                                + sgr_style.without_color
-                            )
-                    yield ANSIStyle(self.style)
-                else:
-                    if (ansi_segment := self._parse_csi(csi)) is not None:
-                        yield ansi_segment
-
-            case ["dec", dec]:
-                slot, character_set = list(dec)
-                yield ANSICharacterSet(DEC(DEC_SLOTS[slot], character_set))
-
-            case ["dec_invoke", dec_invoke]:
-                yield ANSICharacterSet(dec_invoke=self.DEC_INVOKE_MAP[dec_invoke[0]])
-
-            case ["control", code]:
-                if (control := CONTROL_CODES.get(code)) is not None:
-                    if control == "ri":  # control code
-                        yield ANSICursor(delta_y=-1, auto_scroll=True)
-                    elif control == "ind":
-                        yield ANSICursor(delta_y=+1, auto_scroll=True)
-                    else:
-                        print("CONTROL", repr(code), repr(control))
-                else:
-                    print("NOT HANDLED", code)
+    def _update_style(self, csi: str) -> ANSIStyle:
+        """Update the current style from a SGR sequence.
 
-            case ["content", text]:
-                yield ANSIContent(text)
+        Args:
+            csi: CSI sequence (without the escape), ending with "m".
+
+        Returns:
+            A command to set the new style.
+        """
+        if csi in SGR_RESET:
+            sgr_style = None
+        elif (sgr_style := SGR_SEQUENCE_STYLES.get(csi)) is None:
+            sgr_style = parse_sgr(csi)
+        if sgr_style is None:
+            self.style = NULL_STYLE
+        else:
+            self.style += sgr_style
+            # Special case to use widget background rather
+            # than theme background
+            if sgr_style.background is not None and sgr_style.background.ansi == -1:
+                self.style = (
+                    Style(foreground=self.style.foreground) + sgr_style.without_color
+                )
+        return ANSIStyle(self.style)
+
+    def _on_content(self, text: str) -> Iterable[ANSICommand]:
+        yield ANSIContent(text)
+
+    def _on_separator(self, separator: str) -> Iterable[ANSICommand]:
+        if separator == "\n":
+            yield ANSINewLine()
+        else:
+            yield self.ANSI_SEPARATORS[separator]
+
+    def _on_osc(self, osc: str) -> Iterable[ANSICommand]:
+        if osc.startswith("]8;"):
+            self.style += link_style(osc.rpartition(";")[2] or None)
+        elif osc.startswith("]2025;"):
+            current_directory = osc[6:].partition(";")[0]
+            self.current_directory = current_directory
+            yield ANSIWorkingDirectory(current_directory)
+
+    def _on_csi(self, csi: str) -> Iterable[ANSICommand]:
+        if csi.endswith("m"):
+            yield self._update_style(csi)
+        elif (ansi_segment := self._parse_csi(csi)) is not None:
+            yield ansi_segment
+
+    def _on_dec(self, dec: str) -> Iterable[ANSICommand]:
+        slot, character_set = dec
+        yield ANSICharacterSet(DEC(DEC_SLOTS[slot], character_set))
+
+    def _on_dec_invoke(self, dec_invoke: str) -> Iterable[ANSICommand]:
+        yield ANSICharacterSet(dec_invoke=self.DEC_INVOKE_MAP[dec_invoke[0]])
+
+    def _on_control(self, code: str) -> Iterable[ANSICommand]:
+        if (control := CONTROL_CODES.get(code)) is not None:
+            if control == "ri":  # control code
+                yield ANSICursor(delta_y=-1, auto_scroll=True)
+            elif control == "ind":
+                yield ANSICursor(delta_y=+1, auto_scroll=True)
+            elif DEBUG:
+                log.debug("CONTROL", repr(code), repr(control))
+        elif DEBUG:
+            log.debug("NOT HANDLED", code)
+
+    TOKEN_HANDLERS: ClassVar[
+        Mapping[str, Callable[[ANSIStream, str], Iterable[ANSICommand]]]
+    ] = {
+        "content": _on_content,
+        "separator": _on_separator,
+        "osc": _on_osc,
+        "csi": _on_csi,
+        "dec": _on_dec,
+        "dec_invoke": _on_dec_invoke,
+        "control": _on_control,
+    }
+    """Token handlers, keyed on the token type."""
 
-            case _:
-                print("UNKNWON TOKEN", repr(token))
+    def on_token(self, token: tuple[str, str]) -> Iterable[ANSICommand]:
+        token_type, value = token
+        if (handler := self.TOKEN_HANDLERS.get(token_type)) is not None:
+            yield from handler(self, value)
+        elif DEBUG:
+            log.debug("UNKNWON TOKEN", repr(token))
 
 
 class LineFold(NamedTuple):
@@ -720,7 +934,34 @@ class LineFold(NamedTuple):
     """Integer that increments on update."""
 
 
-@dataclass
+@lru_cache(maxsize=1024)
+def fold_content(
+    content: Content, spans: tuple[Span, ...], width: int
+) -> tuple[tuple[int, Content], ...]:
+    """Fold content to a given width.
+
+    Args:
+        content: Content to fold.
+        spans: The content's spans. Content compares on its text alone, so the spans
+            are required to distinguish the cache key.
+        width: Width of folds.
+
+    Returns:
+        A tuple of the offset and content of each fold.
+    """
+    text = content.plain
+    if text and width >= 2 and text.isascii() and text.isprintable():
+        # Printable ASCII is single width, so folds at multiples of the width
+        return tuple(
+            (offset, content[offset : offset + width])
+            for offset in range(0, len(text), width)
+        )
+    folded_lines = content.fold(width)
+    offsets = accumulate((len(line) for line in folded_lines[:-1]), initial=0)
+    return tuple(zip(offsets, folded_lines))
+
+
+@dataclass(slots=True)
 class LineRecord:
     """A single line in the terminal."""
 
@@ -765,7 +1006,7 @@ class ScrollMargin(NamedTuple):
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Buffer:
     """A terminal buffer (scrollback or alternate)"""
 
@@ -820,15 +1061,11 @@ class Buffer:
         cursor_folded_line = self.folded_lines[self.cursor_line]
         cursor_line_offset = cursor_folded_line.line_offset
         line_no = cursor_folded_line.line_no
-        line = self.lines[line_no]
-        position = 0
-        for folded_line_offset, folded_line in enumerate(line.folds):
-            if folded_line_offset == cursor_line_offset:
-                position += self.cursor_offset
-                break
-            position += len(folded_line.content)
-
-        return (line_no, position)
+        folds = self.lines[line_no].folds
+        if cursor_line_offset < len(folds):
+            # Fold offsets are the sum of the lengths of the previous folds
+            return (line_no, folds[cursor_line_offset].offset + self.cursor_offset)
+        return (line_no, sum(len(fold.content) for fold in folds))
 
     @property
     def is_blank(self) -> bool:
@@ -880,9 +1117,9 @@ class Buffer:
             updates: the initial updates index.
 
         """
-        del self.lines[:]
-        del self.line_to_fold[:]
-        del self.folded_lines[:]
+        self.lines.clear()
+        self.line_to_fold.clear()
+        self.folded_lines.clear()
         self.cursor_line = 0
         self.cursor_offset = 0
         self.max_line_width = 0
@@ -898,7 +1135,7 @@ class Buffer:
         self.updates += 1
 
 
-@dataclass
+@dataclass(slots=True)
 class DECState:
     """The (somewhat bonkers) mechanism for switching characters sets pre-unicode."""
 
@@ -906,6 +1143,18 @@ class DECState:
     gl_slot: int = 0
     gr_slot: int = 2
     shift: int | None = None
+    _gl_table: dict[int, str] | None = field(default=None, init=False, repr=False)
+    """Translation table for the GL character set, or `None` if it needs no translation."""
+    is_identity: bool = field(default=True, init=False, repr=False)
+    """Is translation a no-op (no character set translation or single shift)?"""
+
+    def __post_init__(self) -> None:
+        self._update_identity()
+
+    def _update_identity(self) -> None:
+        """Update the GL translation table and identity flag."""
+        self._gl_table = CHARSET_MAP.get(self.gl) or None
+        self.is_identity = self._gl_table is None and self.shift is None
 
     @property
     def gl(self) -> str:
@@ -926,8 +1175,14 @@ class DECState:
                     self.gl_slot = dec_invoke.gl
                 elif dec_invoke.gr is not None:
                     self.gr_slot = dec_invoke.gr
+        self._update_identity()
 
     def translate(self, text: str) -> str:
+        if self.shift is None:
+            # No single shift, which is the usual case
+            if (gl_table := self._gl_table) is None:
+                return text
+            return text.translate(gl_table)
         translate_table: dict[int, str] | None
         first_character: str | None = None
         if self.shift is not None and (
@@ -935,15 +1190,16 @@ class DECState:
         ):
             first_character = text[0].translate(translate_table)
             self.shift = None
+            self.is_identity = self._gl_table is None
 
-        if translate_table := CHARSET_MAP.get(self.gl, None):
+        if translate_table := self._gl_table:
             text = text.translate(translate_table)
         if first_character is None:
             return text
         return f"{first_character}{text}"
 
 
-@dataclass
+@dataclass(slots=True)
 class MouseTracking:
     """The mouse tracking state."""
 
@@ -957,6 +1213,27 @@ class MouseTracking:
 class TerminalState:
     """Abstract terminal state."""
 
+    __slots__ = [
+        "_write_stdin",
+        "_ansi_stream",
+        "width",
+        "height",
+        "style",
+        "show_cursor",
+        "alternate_screen",
+        "bracketed_paste",
+        "cursor_blink",
+        "cursor_keys",
+        "replace_mode",
+        "auto_wrap",
+        "current_directory",
+        "scrollback_buffer",
+        "alternate_buffer",
+        "dec_state",
+        "mouse_tracking",
+        "_updates",
+    ]
+
     def __init__(
         self,
         write_stdin: Callable[[str], Awaitable],
@@ -1073,7 +1350,8 @@ class TerminalState:
         if height is not None:
             self.height = height
 
-        if previous_width != width:
+        if self.width != previous_width:
+            # Folds depend only on the width, so are unchanged otherwise
             self._reflow()
 
     def key_event_to_stdin(self, event: events.Key) -> str | None:
@@ -1129,16 +1407,30 @@ class TerminalState:
         # Unfolded cursor position
         cursor_line, cursor_offset = buffer.cursor
 
-        buffer.folded_lines.clear()
-        buffer.line_to_fold.clear()
+        folded_lines = buffer.folded_lines
+        line_to_fold = buffer.line_to_fold
+        folded_lines.clear()
+        line_to_fold.clear()
         width = self.width
+        auto_wrap = self.auto_wrap
+        fold_line = self._fold_line
+        advance_updates = self.advance_updates
+        add_line_to_fold = line_to_fold.append
 
         for line_no, line_record in enumerate(buffer.lines):
-            line_expanded_tabs = line_record.content.expand_tabs(8)
-            line_record.folds[:] = self._fold_line(line_no, line_expanded_tabs, width)
-            line_record.updates = self.advance_updates()
-            buffer.line_to_fold.append(len(buffer.folded_lines))
-            buffer.folded_lines.extend(line_record.folds)
+            content = line_record.content
+            folds = line_record.folds
+            # A line in a single fold (with no tabs) is unchanged if it still fits
+            if not (
+                len(folds) == 1
+                and (fold := folds[0]).content is content
+                and fold.line_no == line_no
+                and (not auto_wrap or (width and content.cell_length <= width))
+            ):
+                folds[:] = fold_line(line_no, content.expand_tabs(8), width)
+            line_record.updates = advance_updates()
+            add_line_to_fold(len(folded_lines))
+            folded_lines += folds
 
         # After reflow, we need to work out where the cursor is within the folded lines
         # cursor_line = min(cursor_line, len(buffer.lines) - 1)
@@ -1146,15 +1438,17 @@ class TerminalState:
             buffer.cursor_line = len(buffer.lines)
             buffer.cursor_offset = 0
         else:
-            line = buffer.lines[cursor_line]
+            folds = buffer.lines[cursor_line].folds
             fold_cursor_line = buffer.line_to_fold[cursor_line]
 
             fold_cursor_offset = 0
-            for fold in reversed(line.folds):
-                if cursor_offset >= fold.offset:
-                    fold_cursor_line += fold.line_offset
-                    fold_cursor_offset = cursor_offset - fold.offset
-                    break
+            # Find the last fold starting at or before the cursor
+            if fold_index := bisect_right(
+                folds, cursor_offset, key=attrgetter("offset")
+            ):
+                fold = folds[fold_index - 1]
+                fold_cursor_line += fold.line_offset
+                fold_cursor_offset = cursor_offset - fold.offset
 
             buffer.cursor_line = fold_cursor_line
             buffer.cursor_offset = fold_cursor_offset
@@ -1203,20 +1497,6 @@ class TerminalState:
         # Return deltas accumulated during write
         return (scrollback_updates, alternate_updates)
 
-    def get_cursor_line_offset(self, buffer: Buffer) -> int:
-        """The cursor offset within the un-folded lines."""
-        cursor_folded_line = buffer.folded_lines[buffer.cursor_line]
-        cursor_line_offset = cursor_folded_line.line_offset
-        line_no = cursor_folded_line.line_no
-        line = buffer.lines[line_no]
-        position = 0
-        for folded_line_offset, folded_line in enumerate(line.folds):
-            if folded_line_offset == cursor_line_offset:
-                position += buffer.cursor_offset
-                break
-            position += len(folded_line.content)
-        return position
-
     def clear_buffer(self, clear: ClearType) -> None:
         buffer = self.buffer
         if clear == "screen":
@@ -1225,14 +1505,16 @@ class TerminalState:
             #     self.add_line(buffer, EMPTY_CONTENT)
         elif clear == "cursor_to_end":
             buffer._updated_lines = None
-            folded_cursor_line = buffer.cursor_line
-            cursor_line, cursor_line_offset = buffer.cursor
             while buffer.cursor_line >= len(buffer.folded_lines):
                 self.add_line(buffer, EMPTY_LINE)
+            cursor_line, cursor_line_offset = buffer.cursor
             line = buffer.lines[cursor_line]
             del buffer.lines[cursor_line + 1 :]
             del buffer.line_to_fold[cursor_line + 1 :]
-            del buffer.folded_lines[folded_cursor_line + 1 :]
+            # Keep all the folds of the cursor line, which update_line replaces
+            del buffer.folded_lines[
+                buffer.line_to_fold[cursor_line] + len(line.folds) :
+            ]
             self.update_line(buffer, cursor_line, line.content[:cursor_line_offset])
         else:
             # print(f"TODO: clear_buffer({clear!r})")
@@ -1248,37 +1530,31 @@ class TerminalState:
         buffer = self.buffer
         margin_top, margin_bottom = buffer.scroll_margin.get_line_range(self.height)
 
+        scroll_lines = buffer.lines
+        updated_lines: list[tuple[Content, Style | None]] = []
         if direction == -1:
             # up (first in test)
             for line_no in range(margin_top, margin_bottom + 1):
                 copy_line_no = line_no + lines
                 copy_content = EMPTY_CONTENT
                 copy_style = NULL_STYLE
-                if copy_line_no <= margin_bottom:
-                    try:
-                        copy_line = buffer.lines[copy_line_no]
-                    except IndexError:
-                        pass
-                    else:
-                        copy_content = copy_line.content
-                        copy_style = copy_line.style
-
-                self.update_line(buffer, line_no, copy_content, copy_style)
+                if copy_line_no <= margin_bottom and copy_line_no < len(scroll_lines):
+                    copy_line = scroll_lines[copy_line_no]
+                    copy_content = copy_line.content
+                    copy_style = copy_line.style
+                updated_lines.append((copy_content, copy_style))
         else:
             # down
-            for line_no in reversed(range(margin_top, margin_bottom + 1)):
+            for line_no in range(margin_top, margin_bottom + 1):
                 copy_line_no = line_no - lines
                 copy_content = EMPTY_CONTENT
                 copy_style = NULL_STYLE
-                if copy_line_no >= margin_top:
-                    try:
-                        copy_line = buffer.lines[copy_line_no]
-                    except IndexError:
-                        pass
-                    else:
-                        copy_content = copy_line.content
-                        copy_style = copy_line.style
-                self.update_line(buffer, line_no, copy_content, copy_style)
+                if copy_line_no >= margin_top and copy_line_no < len(scroll_lines):
+                    copy_line = scroll_lines[copy_line_no]
+                    copy_content = copy_line.content
+                    copy_style = copy_line.style
+                updated_lines.append((copy_content, copy_style))
+        self.update_lines(buffer, margin_top, updated_lines)
 
     @classmethod
     def _expand_content(cls, content: Content, offset: int, style: Style) -> Content:
@@ -1292,225 +1568,257 @@ class TerminalState:
         Returns:
             New Content.
         """
-        if offset > len(content):
-            content += Content.blank(offset - len(content), style)
+        if (padding := offset - len(content)) > 0:
+            # Pad with a single blank span, without re-measuring the line
+            spans = [*content.spans]
+            if style:
+                spans.append(Span(len(content), offset, style))
+            content = Content(content.plain + " " * padding, spans)
         return content
 
-    async def _handle_ansi_command(self, ansi_command: ANSICommand) -> None:
-        if isinstance(ansi_command, ANSINewLine):
-            if self.alternate_screen:
-                # New line behaves differently in alternate screen
-                ansi_command = ANSICursor(delta_y=+1, auto_scroll=True)
+    def _on_style(self, command: ANSIStyle) -> None:
+        self.style = command.style
+
+    def _on_content(self, command: ANSIContent) -> None:
+        text = command.text
+        buffer = self.buffer
+        folded_lines = buffer.folded_lines
+        while buffer.cursor_line >= len(folded_lines):
+            self.add_line(buffer, EMPTY_LINE)
+        line_no = folded_lines[buffer.cursor_line].line_no
+        line = buffer.lines[line_no]
+
+        _, cursor_line_offset = buffer.cursor
+        line_content = line.content
+        line_length = len(line_content)
+        if cursor_line_offset > line_length:
+            line_content = self._expand_content(
+                line_content, cursor_line_offset, line.style
+            )
+            # Padding strips control codes, so the line may be shorter than the offset
+            line_length = len(line_content)
+        if not (dec_state := self.dec_state).is_identity:
+            text = dec_state.translate(text)
+        style = self.style
+        cursor_end_offset = cursor_line_offset + len(text)
+        if cursor_line_offset == line_length:
+            # Appending to the end of the line (the common case for streamed output)
+            # Re-uses the existing spans rather than assembling a new line
+            spans = [*line_content.spans]
+            if style:
+                spans.append(Span(cursor_line_offset, cursor_end_offset, style))
+            updated_line = Content(
+                line_content.plain + text, spans, strip_control_codes=False
+            )
+            self.update_line(buffer, line_no, updated_line, append=True)
+        else:
+            # Replace mode overwrites the following text, otherwise it is moved right
+            tail_offset = cursor_end_offset if self.replace_mode else cursor_line_offset
+            updated_line = Content.assemble(
+                line_content[:cursor_line_offset],
+                Content.styled(text, style, strip_control_codes=False),
+                line_content[tail_offset:],
+                strip_control_codes=False,
+            )
+            self.update_line(buffer, line_no, updated_line)
+        buffer.update_cursor(line_no, cursor_end_offset)
+        buffer.updates = self.advance_updates()
+
+    def _on_cursor(self, command: ANSICursor) -> None:
+        (
+            delta_x,
+            delta_y,
+            absolute_x,
+            absolute_y,
+            erase,
+            clear_range,
+            _relative,
+            update_background,
+            auto_scroll,
+        ) = command
+        # print(repr(command))
+        buffer = self.buffer
+        folded_lines = buffer.folded_lines
+        while buffer.cursor_line >= len(folded_lines):
+            self.add_line(buffer, EMPTY_LINE)
+
+        if auto_scroll and delta_y is not None:
+            margins = buffer.scroll_margin.get_line_range(self.height)
+            margin_top, margin_bottom = margins
+
+            if buffer.cursor_line >= margin_top and buffer.cursor_line <= margin_bottom:
+                start_line_no = self.screen_start_line_no
+                start_line_no = 0
+                scroll_cursor = buffer.cursor_line + delta_y
+                if scroll_cursor > (start_line_no + margin_bottom):
+                    self.scroll_buffer(-1, 1)
+                    return
+                elif scroll_cursor < (start_line_no + margin_top):
+                    self.scroll_buffer(+1, 1)
+                    return
+
+        folded_line = folded_lines[buffer.cursor_line]
+        previous_content = folded_line.content
+        line = buffer.lines[folded_line.line_no]
+        if update_background:
+            line.style = self.style
+
+        if clear_range is not None:
+            _, cursor_line_offset = buffer.cursor
+
+            line_content = line.content
+            if cursor_line_offset > len(line.content):
+                line_content = self._expand_content(
+                    line.content, cursor_line_offset, line.style
+                )
+
+            # Start and end replace are *inclusive*
+            clear_start, clear_end = command.get_clear_offsets(
+                cursor_line_offset, len(line_content)
+            )
+
+            before_clear = line_content[:clear_start]
+            after_clear = line_content[clear_end + 1 :]
+
+            if erase:
+                # Range is remove
+                updated_line = Content.assemble(
+                    before_clear,
+                    after_clear,
+                    strip_control_codes=False,
+                )
+                self.update_line(buffer, folded_line.line_no, updated_line)
             else:
-                ansi_command = ANSICursor(delta_y=+1, absolute_x=0)
-
-        match ansi_command:
-            case ANSIStyle(style):
-                self.style = style
-
-            case ANSIContent(text):
-                buffer = self.buffer
-                folded_lines = buffer.folded_lines
-                while buffer.cursor_line >= len(folded_lines):
-                    self.add_line(buffer, EMPTY_LINE)
-                folded_line = folded_lines[buffer.cursor_line]
-                previous_content = folded_line.content
-                line_no = folded_line.line_no
-                line = buffer.lines[line_no]
-
-                cursor_line_offset = self.get_cursor_line_offset(buffer)
-                line_content = line.content
-                if cursor_line_offset > len(line_content):
-                    line_content = self._expand_content(
-                        line_content, cursor_line_offset, line.style
-                    )
-                content = Content.styled(
-                    self.dec_state.translate(text),
-                    self.style,
+                # Range is replaced with spaces
+                blank_width = clear_end - clear_start + 1
+
+                updated_line = Content.assemble(
+                    before_clear,
+                    Content.blank(blank_width, self.style),
+                    after_clear,
                     strip_control_codes=False,
                 )
-                if self.replace_mode:
-                    updated_line = Content.assemble(
-                        line_content[:cursor_line_offset],
-                        content,
-                        line_content[cursor_line_offset + len(content) :],
-                        strip_control_codes=False,
-                    )
-                else:
-                    updated_line = Content.assemble(
-                        line_content[:cursor_line_offset],
-                        content,
-                        line_content[cursor_line_offset:],
-                        strip_control_codes=False,
-                    )
-                self.update_line(buffer, line_no, updated_line)
-                buffer.update_cursor(line_no, cursor_line_offset + len(content))
-                buffer.updates = self.advance_updates()
-
-            case ANSICursor(
-                delta_x,
-                delta_y,
-                absolute_x,
-                absolute_y,
-                erase,
-                clear_range,
-                _relative,
-                update_background,
-                auto_scroll,
-            ):
-                # print(repr(ansi_command))
-                buffer = self.buffer
-                folded_lines = buffer.folded_lines
-                while buffer.cursor_line >= len(folded_lines):
-                    self.add_line(buffer, EMPTY_LINE)
-
-                if auto_scroll and delta_y is not None:
-                    margins = buffer.scroll_margin.get_line_range(self.height)
-                    margin_top, margin_bottom = margins
-
-                    if (
-                        buffer.cursor_line >= margin_top
-                        and buffer.cursor_line <= margin_bottom
-                    ):
-                        start_line_no = self.screen_start_line_no
-                        start_line_no = 0
-                        scroll_cursor = buffer.cursor_line + delta_y
-                        if scroll_cursor > (start_line_no + margin_bottom):
-                            self.scroll_buffer(-1, 1)
-                            return
-                        elif scroll_cursor < (start_line_no + margin_top):
-                            self.scroll_buffer(+1, 1)
-                            return
-
-                folded_line = folded_lines[buffer.cursor_line]
-                previous_content = folded_line.content
-                line = buffer.lines[folded_line.line_no]
-                if update_background:
-                    line.style = self.style
-
-                if clear_range is not None:
-                    cursor_line_offset = self.get_cursor_line_offset(buffer)
-
-                    line_content = line.content
-                    if cursor_line_offset > len(line.content):
-                        line_content = self._expand_content(
-                            line.content, cursor_line_offset, line.style
-                        )
-
-                    # Start and end replace are *inclusive*
-                    clear_start, clear_end = ansi_command.get_clear_offsets(
-                        cursor_line_offset, len(line_content)
-                    )
+                self.update_line(buffer, folded_line.line_no, updated_line)
 
-                    before_clear = line_content[:clear_start]
-                    after_clear = line_content[clear_end + 1 :]
-
-                    if erase:
-                        # Range is remove
-                        updated_line = Content.assemble(
-                            before_clear,
-                            after_clear,
-                            strip_control_codes=False,
-                        )
-                        self.update_line(buffer, folded_line.line_no, updated_line)
-                    else:
-                        # Range is replaced with spaces
-                        blank_width = clear_end - clear_start + 1
-
-                        updated_line = Content.assemble(
-                            before_clear,
-                            Content.blank(blank_width, self.style),
-                            after_clear,
-                            strip_control_codes=False,
-                        )
-                        self.update_line(buffer, folded_line.line_no, updated_line)
-
-                if not previous_content.is_same(folded_line.content):
-                    buffer.updates = self.advance_updates()
-
-                if delta_x is not None:
-                    buffer.cursor_offset = clamp(
-                        buffer.cursor_offset + delta_x, 0, self.width - 1
-                    )
-                    buffer.update_line(buffer.cursor_line)
-                if absolute_x is not None:
-                    buffer.cursor_offset = clamp(absolute_x, 0, self.width - 1)
-                    buffer.update_line(buffer.cursor_line)
-
-                current_cursor_line = buffer.cursor_line
-                if delta_y is not None:
-                    buffer.update_line(buffer.cursor_line)
-                    buffer.cursor_line = max(0, buffer.cursor_line + delta_y)
-                    buffer.update_line(buffer.cursor_line)
-                if absolute_y is not None:
-                    buffer.update_line(buffer.cursor_line)
-                    buffer.cursor_line = max(0, absolute_y)
-                    buffer.update_line(buffer.cursor_line)
-
-                if current_cursor_line != buffer.cursor_line:
-                    # Simplify when the cursor moves away from the current line
-                    line.content.simplify()  # Reduce segments
-                    self._line_updated(buffer, current_cursor_line)
-                    self._line_updated(buffer, buffer.cursor_line)
-
-            case ANSIFeatures() as features:
-                if features.show_cursor is not None:
-                    self.show_cursor = features.show_cursor
-                if features.alternate_screen is not None:
-                    self.alternate_screen = features.alternate_screen
-                if features.bracketed_paste is not None:
-                    self.bracketed_paste = features.bracketed_paste
-                if features.cursor_blink is not None:
-                    self.cursor_blink = features.cursor_blink
-                if features.cursor_keys is not None:
-                    self.cursor_keys = features.cursor_keys
-                if features.auto_wrap is not None:
-                    self.auto_wrap = features.auto_wrap
-                self.advance_updates()
-
-            case ANSIClear(clear):
-                self.clear_buffer(clear)
-
-            case ANSIScrollMargin(top, bottom):
-                self.buffer.scroll_margin = ScrollMargin(top, bottom)
-                # Setting the scroll margins moves the cursor to (1, 1)
-                buffer = self.buffer
-                self._line_updated(buffer, buffer.cursor_line)
-                buffer.cursor_line = 0
-                buffer.cursor_offset = 0
-                self._line_updated(buffer, buffer.cursor_line)
-
-            case ANSIScroll(direction, lines):
-                self.scroll_buffer(direction, lines)
-
-            case ANSICharacterSet(dec, dec_invoke):
-                self.dec_state.update(dec, dec_invoke)
-
-            case ANSIWorkingDirectory(path):
-                self.current_directory = path
-
-            case ANSIMouseTracking(tracking, format, focus_events, alternate_scroll):
-                if tracking == "none":
-                    self.mouse_tracking = None
-                    return
-                if (mouse_tracking := self.mouse_tracking) is None:
-                    mouse_tracking = self.mouse_tracking = MouseTracking()
-                if tracking is not None:
-                    mouse_tracking.tracking = tracking
-                if format is not None:
-                    mouse_tracking.format = format
-                if focus_events is not None:
-                    mouse_tracking.focus_events = focus_events
-                if alternate_scroll is not None:
-                    mouse_tracking.alternate_scroll = alternate_scroll
-
-            case ANSICursorPositionRequest():
-                row = self.buffer.cursor_line + 1
-                column = self.buffer.cursor_offset + 1
-                await self.write_stdin(f"\x1b[{row};{column}R")
-
-            case _:
-                print("Unhandled", ansi_command)
+        if not previous_content.is_same(folded_line.content):
+            buffer.updates = self.advance_updates()
+
+        if delta_x is not None:
+            buffer.cursor_offset = clamp(
+                buffer.cursor_offset + delta_x, 0, self.width - 1
+            )
+            buffer.update_line(buffer.cursor_line)
+        if absolute_x is not None:
+            buffer.cursor_offset = clamp(absolute_x, 0, self.width - 1)
+            buffer.update_line(buffer.cursor_line)
+
+        current_cursor_line = buffer.cursor_line
+        if delta_y is not None:
+            buffer.update_line(buffer.cursor_line)
+            buffer.cursor_line = max(0, buffer.cursor_line + delta_y)
+            buffer.update_line(buffer.cursor_line)
+        if absolute_y is not None:
+            buffer.update_line(buffer.cursor_line)
+            buffer.cursor_line = max(0, absolute_y)
+            buffer.update_line(buffer.cursor_line)
+
+        if current_cursor_line != buffer.cursor_line:
+            # Simplify when the cursor moves away from the current line
+            if len((line_content := line.content).spans) > 1:
+                line_content.simplify()  # Reduce segments
+            self._line_updated(buffer, current_cursor_line)
+            self._line_updated(buffer, buffer.cursor_line)
+
+    def _on_new_line(self, command: ANSINewLine) -> None:
+        # New line behaves differently in alternate screen
+        self._on_cursor(ALTERNATE_NEW_LINE if self.alternate_screen else NEW_LINE)
+
+    def _on_features(self, features: ANSIFeatures) -> None:
+        if features.show_cursor is not None:
+            self.show_cursor = features.show_cursor
+        if features.alternate_screen is not None:
+            self.alternate_screen = features.alternate_screen
+        if features.bracketed_paste is not None:
+            self.bracketed_paste = features.bracketed_paste
+        if features.cursor_blink is not None:
+            self.cursor_blink = features.cursor_blink
+        if features.cursor_keys is not None:
+            self.cursor_keys = features.cursor_keys
+        if features.auto_wrap is not None:
+            self.auto_wrap = features.auto_wrap
+        self.advance_updates()
+
+    def _on_clear(self, command: ANSIClear) -> None:
+        self.clear_buffer(command.clear)
+
+    def _on_scroll_margin(self, command: ANSIScrollMargin) -> None:
+        top, bottom = command
+        buffer = self.buffer
+        buffer.scroll_margin = ScrollMargin(top, bottom)
+        # Setting the scroll margins moves the cursor to (1, 1)
+        cursor_line = buffer.cursor_line
+        self._line_updated(buffer, cursor_line)
+        buffer.cursor_line = 0
+        buffer.cursor_offset = 0
+        if cursor_line:
+            self._line_updated(buffer, 0)
+
+    def _on_scroll(self, command: ANSIScroll) -> None:
+        self.scroll_buffer(command.direction, command.lines)
+
+    def _on_character_set(self, command: ANSICharacterSet) -> None:
+        self.dec_state.update(command.dec, command.dec_invoke)
+
+    def _on_working_directory(self, command: ANSIWorkingDirectory) -> None:
+        self.current_directory = command.path
+
+    def _on_mouse_tracking(self, command: ANSIMouseTracking) -> None:
+        tracking, format, focus_events, alternate_scroll = command
+        if tracking == "none":
+            self.mouse_tracking = None
+            return
+        if (mouse_tracking := self.mouse_tracking) is None:
+            mouse_tracking = self.mouse_tracking = MouseTracking()
+        if tracking is not None:
+            mouse_tracking.tracking = tracking
+        if format is not None:
+            mouse_tracking.format = format
+        if focus_events is not None:
+            mouse_tracking.focus_events = focus_events
+        if alternate_scroll is not None:
+            mouse_tracking.alternate_scroll = alternate_scroll
+
+    async def _on_cursor_position_request(
+        self, command: ANSICursorPositionRequest
+    ) -> None:
+        row = self.buffer.cursor_line + 1
+        column = self.buffer.cursor_offset + 1
+        await self.write_stdin(f"\x1b[{row};{column}R")
+
+    COMMAND_HANDLERS: ClassVar[
+        Mapping[type, Callable[[TerminalState, Any], Awaitable[None] | None]]
+    ] = {
+        ANSIStyle: _on_style,
+        ANSIContent: _on_content,
+        ANSICursor: _on_cursor,
+        ANSINewLine: _on_new_line,
+        ANSIFeatures: _on_features,
+        ANSIClear: _on_clear,
+        ANSIScrollMargin: _on_scroll_margin,
+        ANSIScroll: _on_scroll,
+        ANSICharacterSet: _on_character_set,
+        ANSIWorkingDirectory: _on_working_directory,
+        ANSIMouseTracking: _on_mouse_tracking,
+        ANSICursorPositionRequest: _on_cursor_position_request,
+    }
+    """Command handlers, keyed on the command type. Async handlers return an awaitable."""
+
+    async def _handle_ansi_command(self, ansi_command: ANSICommand) -> None:
+        if (handler := self.COMMAND_HANDLERS.get(type(ansi_command))) is None:
+            if DEBUG:
+                log.debug("Unhandled", ansi_command)
+        elif (awaitable := handler(self, ansi_command)) is not None:
+            await awaitable
 
     def _line_updated(self, buffer: Buffer, line_no: int) -> None:
         """Mark a line has having been udpated.
@@ -1536,12 +1844,10 @@ class TerminalState:
         if line_length <= width:
             return [LineFold(line_no, 0, 0, line, updates)]
 
-        folded_lines = line.fold(width)
-        offsets = [0, *accumulate(len(line) for line in folded_lines)][:-1]
         folds = [
             LineFold(line_no, line_offset, offset, folded_line, updates)
             for line_offset, (offset, folded_line) in enumerate(
-                zip(offsets, folded_lines)
+                fold_content(line, tuple(line.spans), width)
             )
         ]
         assert len(folds)
@@ -1569,7 +1875,13 @@ class TerminalState:
         buffer.updates = updates
 
     def update_line(
-        self, buffer: Buffer, line_index: int, line: Content, style: Style | None = None
+        self,
+        buffer: Buffer,
+        line_index: int,
+        line: Content,
+        style: Style | None = None,
+        *,
+        append: bool = False,
     ) -> None:
         """Update a line (potentially refolding and moving subsequencte lines down).
 
@@ -1578,35 +1890,117 @@ class TerminalState:
             line_index: Line index (unfolded).
             line: New line content.
             style: New background style, or `None` not to update.
+            append: The new content is the previous content with text appended.
         """
-        while line_index >= len(buffer.lines):
+        lines = buffer.lines
+        while line_index >= len(lines):
             self.add_line(buffer, EMPTY_LINE)
 
         line_expanded_tabs = line.expand_tabs(8)
-        buffer.max_line_width = max(
-            line_expanded_tabs.cell_length, buffer.max_line_width
-        )
-        line_record = buffer.lines[line_index]
+        if (cell_length := line_expanded_tabs.cell_length) > buffer.max_line_width:
+            buffer.max_line_width = cell_length
+        line_record = lines[line_index]
         line_record.content = line
         if style is not None:
             line_record.style = style
-        line_record.folds[:] = self._fold_line(
-            line_index, line_expanded_tabs, self.width
-        )
+        folds = line_record.folds
+        previous_fold_count = len(folds)
+        width = self.width
+        if (
+            append
+            and previous_fold_count > 1
+            and self.auto_wrap
+            and len(folds[0].content) == width
+            and (plain := line_expanded_tabs.plain).isascii()
+            and plain.isprintable()
+        ):
+            # Printable ASCII folds at multiples of the width, so appending text
+            # leaves all but the last fold unchanged
+            tail_offset = folds[-1].offset
+            tail = line_expanded_tabs[tail_offset:]
+            updates = self._updates
+            folds[-1:] = [
+                LineFold(
+                    line_index, line_offset, tail_offset + offset, content, updates
+                )
+                for line_offset, (offset, content) in enumerate(
+                    fold_content(tail, tuple(tail.spans), width),
+                    previous_fold_count - 1,
+                )
+            ]
+        else:
+            folds[:] = self._fold_line(line_index, line_expanded_tabs, width)
         line_record.updates = self.advance_updates()
 
-        if buffer._updated_lines is not None:
-            fold_start = buffer.line_to_fold[line_index]
-            buffer._updated_lines.update(
-                range(fold_start, fold_start + len(line_record.folds))
-            )
+        line_to_fold = buffer.line_to_fold
+        fold_start = line_to_fold[line_index]
+        if (updated_lines := buffer._updated_lines) is not None:
+            updated_lines.update(range(fold_start, fold_start + len(folds)))
+
+        # Only this line's folds change; subsequent lines move if the fold count differs
+        buffer.folded_lines[fold_start : fold_start + previous_fold_count] = folds
+        if fold_delta := len(folds) - previous_fold_count:
+            line_to_fold[line_index + 1 :] = [
+                fold_index + fold_delta for fold_index in line_to_fold[line_index + 1 :]
+            ]
+
+    def update_lines(
+        self,
+        buffer: Buffer,
+        line_index: int,
+        lines: list[tuple[Content, Style | None]],
+    ) -> None:
+        """Update consecutive lines, moving subsequent folded lines once.
+
+        Args:
+            buffer: Buffer.
+            line_index: Index of the first line (unfolded).
+            lines: New content and background style (or `None` not to update) for each line.
+        """
+        if not lines:
+            return
+        end_index = line_index + len(lines)
+        while end_index > len(buffer.lines):
+            self.add_line(buffer, EMPTY_LINE)
 
-        fold_line = buffer.line_to_fold[line_index]
-        del buffer.line_to_fold[line_index:]
-        del buffer.folded_lines[fold_line:]
+        width = self.width
+        fold_line = self._fold_line
+        advance_updates = self.advance_updates
+        buffer_lines = buffer.lines
+        folded_lines = buffer.folded_lines
+        line_to_fold = buffer.line_to_fold
+        fold_count = len(folded_lines)
+        fold_start = line_to_fold[line_index]
+        previous_fold_end = (
+            line_to_fold[end_index] if end_index < len(buffer_lines) else fold_count
+        )
+        updated_folds: list[LineFold] = []
+        max_line_width = buffer.max_line_width
+        for line_no, (line, style) in enumerate(lines, line_index):
+            line_expanded_tabs = line.expand_tabs(8)
+            if (cell_length := line_expanded_tabs.cell_length) > max_line_width:
+                max_line_width = cell_length
+            line_record = buffer_lines[line_no]
+            line_record.content = line
+            if style is not None:
+                line_record.style = style
+            folds = line_record.folds
+            folds[:] = fold_line(line_no, line_expanded_tabs, width)
+            line_record.updates = advance_updates()
+            line_to_fold[line_no] = fold_start + len(updated_folds)
+            updated_folds += folds
+        buffer.max_line_width = max_line_width
+
+        # Replace the folds of the updated lines, and move subsequent lines if required
+        folded_lines[fold_start:previous_fold_end] = updated_folds
+        fold_end = fold_start + len(updated_folds)
+        if fold_delta := fold_end - previous_fold_end:
+            line_to_fold[end_index:] = [
+                fold_index + fold_delta for fold_index in line_to_fold[end_index:]
+            ]
 
-        for line_no in range(line_index, buffer.line_count):
-            line_record = buffer.lines[line_no]
-            buffer.line_to_fold.append(len(buffer.folded_lines))
-            for fold in line_record.folds:
-                buffer.folded_lines.append(fold)
+        if buffer._updated_lines is not None:
+            if fold_delta:
+                # Subsequent lines have moved (or been removed)
+                fold_end = max(len(folded_lines), fold_count)
+            buffer._updated_lines.update(range(fold_start, fold_end))
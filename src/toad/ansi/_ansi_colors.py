@@ -1,8 +1,9 @@
 from typing import Sequence
 
 from textual.color import Color
+from textual.style import Style
 
-_ANSI_COLORS: Sequence[str] = [
+_ANSI_COLORS: Sequence[str] = (
     "ansi_black",
     "ansi_red",
     "ansi_green",
@@ -259,6 +260,16 @@ _ANSI_COLORS: Sequence[str] = [
     "rgb(218,218,218)",
     "rgb(228,228,228)",
     "rgb(238,238,238)",
-]
+)
 
-ANSI_COLORS: list[Color] = [Color.parse(color) for color in _ANSI_COLORS]
+ANSI_COLORS: tuple[Color, ...] = tuple(Color.parse(color) for color in _ANSI_COLORS)
+
+ANSI_FOREGROUND_STYLES: tuple[Style, ...] = tuple(
+    Style(foreground=color) for color in ANSI_COLORS
+)
+"""Styles for the 256 ANSI colors as foreground (SGR 38;5;n)."""
+
+ANSI_BACKGROUND_STYLES: tuple[Style, ...] = tuple(
+    Style(background=color) for color in ANSI_COLORS
+)
+"""Styles for the 256 ANSI colors as background (SGR 48;5;n)."""
@@ -1,4 +1,6 @@
-TERMINAL_KEY_MAP = {
+from typing import Mapping
+
+TERMINAL_KEY_MAP: Mapping[str, str] = {
     # ============================================================================
     # FUNCTION KEYS (F1-F12)
     # ============================================================================
@@ -218,9 +220,6 @@ TERMINAL_KEY_MAP = {
     "ctrl+`": "\x00",  # Ctrl+` = NUL (same as Ctrl+Space)
     "ctrl+-": "\x1f",  # Ctrl+- = US
     "ctrl+=": "\x1b[27;5;61~",  # CSI 27 ; 5 ; 61 ~
-    "ctrl+[": "\x1b",  # ESC (same as escape)
-    "ctrl+]": "\x1d",  # GS
-    "ctrl+\\": "\x1c",  # FS
     "ctrl+;": "\x1b[27;5;59~",
     "ctrl+'": "\x1b[27;5;39~",
     "ctrl+,": "\x1b[27;5;44~",
@@ -241,7 +240,7 @@ TERMINAL_KEY_MAP = {
 }
 
 
-CURSOR_KEYS_APPLICATION = {
+CURSOR_KEYS_APPLICATION: Mapping[str, str] = {
     "up": "\x1bOA",
     "down": "\x1bOB",
     "right": "\x1bOC",
@@ -62,3 +62,13 @@ SGR_STYLES: Mapping[int, Style] = {
     106: Style(background=Color(0, 255, 255, ansi=14)),
     107: Style(background=Color(255, 255, 255, ansi=15)),
 }
+
+SGR_STYLE_TABLE: tuple[Style | None, ...] = tuple(
+    SGR_STYLES.get(code) for code in range(256)
+)
+"""SGR styles indexed by code (SGR codes are clamped to 255)."""
+
+SGR_SEQUENCE_STYLES: Mapping[str, Style] = {
+    f"[{code}m": style for code, style in SGR_STYLES.items()
+}
+"""Styles for the most common SGR sequences, which contain a single code."""
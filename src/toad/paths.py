@@ -2,7 +2,12 @@ from contextlib import suppress
 from pathlib import Path
 from typing import Final
 
-from xdg_base_dirs import xdg_config_home, xdg_data_home, xdg_state_home
+from xdg_base_dirs import (
+    xdg_cache_home,
+    xdg_config_home,
+    xdg_data_home,
+    xdg_state_home,
+)
 
 
 APP_NAME: Final[str] = "toad"
@@ -45,6 +50,14 @@ def get_state() -> Path:
     return path
 
 
+def get_cache() -> Path:
+    """Return (possibly creating) the application cache directory."""
+    path = xdg_cache_home() / APP_NAME
+    with suppress(OSError):
+        path.mkdir(0o700, exist_ok=True, parents=True)
+    return path
+
+
 def get_project_data(project_path: Path) -> Path:
     """Get a directory for per-project data.
 
@@ -5,7 +5,7 @@ import copy
 from functools import cached_property
 from json import dumps
 from dataclasses import dataclass
-from typing import Callable, Iterable, KeysView, Sequence, TypedDict, Required
+from typing import Callable, KeysView, Sequence, TypedDict, Required
 
 from toad._loop import loop_last
 
@@ -119,18 +119,7 @@ class Schema:
         Returns:
             Default, or `None`.
         """
-        defaults = self.defaults
-
-        schema_object = defaults
-        for last, sub_key in loop_last(parse_key(key)):
-            if last:
-                return schema_object.get(sub_key, None)
-            else:
-                if isinstance(schema_object, dict):
-                    schema_object = schema_object.get(sub_key, {})
-                else:
-                    return None
-        return None
+        return self.default_map.get(key)
 
     @cached_property
     def defaults(self) -> dict[str, object]:
@@ -155,6 +144,20 @@ class Schema:
         set_defaults(self.schema, settings)
         return settings
 
+    @cached_property
+    def default_map(self) -> Mapping[str, object]:
+        """Defaults keyed on their dotted key (including groups)."""
+        default_map: dict[str, object] = {}
+
+        def add_defaults(prefix: str, defaults: dict[str, object]) -> None:
+            for key, default in defaults.items():
+                default_map[dotted_key := f"{prefix}{key}"] = default
+                if isinstance(default, dict):
+                    add_defaults(f"{dotted_key}.", default)
+
+        add_defaults("", self.defaults)
+        return default_map
+
     @cached_property
     def key_to_type(self) -> Mapping[str, type]:
         TYPE_MAP = {
@@ -167,18 +170,15 @@ class Schema:
             "text": str,
         }
 
-        def get_keys(setting: Setting) -> Iterable[tuple[str, type]]:
+        keys: dict[str, type] = {}
+        # Depth first, in schema order
+        stack = [*reversed(self.settings_map.values())]
+        while stack:
+            setting = stack.pop()
             if setting.type == "object" and setting.children:
-                for child in setting.children.values():
-                    yield from get_keys(child)
+                stack.extend(reversed(setting.children.values()))
             else:
-                yield (setting.key, TYPE_MAP[setting.type])
-
-        keys = {
-            key: value_type
-            for setting in self.settings_map.values()
-            for key, value_type in get_keys(setting)
-        }
+                keys[setting.key] = TYPE_MAP[setting.type]
         return keys
 
     @property
@@ -195,6 +195,7 @@ class Schema:
             schema_type = schema.get("type")
             assert schema_type is not None
             if schema_type == "object":
+                prefix = f"{name}."
                 return Setting(
                     name,
                     schema["title"],
@@ -203,8 +204,8 @@ class Schema:
                     default=schema.get("default", default),
                     validate=schema.get("validate"),
                     children={
-                        schema["key"]: build_settings(f"{name}.{schema['key']}", schema)
-                        for schema in schema.get("fields", [])
+                        (key := field["key"]): build_settings(prefix + key, field)
+                        for field in schema.get("fields", [])
                     },
                     editable=schema.get("editable", True),
                 )
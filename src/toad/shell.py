@@ -25,6 +25,9 @@ if TYPE_CHECKING:
 
 IS_MACOS = platform.system() == "Darwin"
 
+PRINT_WORKING_DIRECTORY = r'printf "\e]2025;$(pwd);\e\\"'
+"""Shell command to report the working directory (with a private OSC)."""
+
 
 def resize_pty(fd, cols, rows):
     """Resize the pseudo-terminal"""
@@ -91,7 +94,7 @@ class Shell:
     async def send(self, command: str, width: int, height: int) -> None:
         await self._ready_event.wait()
         if self.master is None:
-            print("TTY FD not set")
+            log.warning("TTY FD not set")
             return
 
         if self.terminal is not None:
@@ -103,7 +106,7 @@ class Shell:
         except OSError:
             pass
 
-        get_pwd_command = f"{command};" + r'printf "\e]2025;$(pwd);\e\\"' + "\n"
+        get_pwd_command = f"{command};{PRINT_WORKING_DIRECTORY}\n"
         await self.write(get_pwd_command, hide_echo=True)
 
     def start(self) -> None:
@@ -211,8 +214,7 @@ class Shell:
 
             for string_bytes in list(self._hide_echo):
                 remove_bytes = string_bytes
-                if remove_bytes in data:
-                    remove_start = data.index(remove_bytes)
+                if (remove_start := data.find(remove_bytes)) != -1:
                     try:
                         next_line = data.index(b"\n", remove_start + len(remove_bytes))
                     except ValueError:
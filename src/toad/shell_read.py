@@ -2,6 +2,10 @@ import asyncio
 from contextlib import suppress
 from time import monotonic
 
+from textual import log
+
+from toad.constants import DEBUG
+
 
 async def shell_read(
     reader: asyncio.StreamReader,
@@ -26,17 +30,22 @@ async def shell_read(
     except OSError:
         data = b""
     if data and buffer_period is not None:
+        chunks = [data]
+        data_size = len(data)
         buffer_time = monotonic() + max_buffer_duration
         with suppress(asyncio.TimeoutError):
-            while len(data) < buffer_size and (time := monotonic()) < buffer_time:
+            while data_size < buffer_size and (time := monotonic()) < buffer_time:
                 async with asyncio.timeout(min(buffer_time - time, buffer_period)):
                     try:
-                        if chunk := await reader.read(buffer_size - len(data)):
-                            data += chunk
+                        if chunk := await reader.read(buffer_size - data_size):
+                            chunks.append(chunk)
+                            data_size += len(chunk)
                         else:
                             break
                     except OSError as error:
-                        print(repr(error))
-
+                        if DEBUG:
+                            log.debug(repr(error))
                         break
+        if len(chunks) > 1:
+            data = b"".join(chunks)
     return data
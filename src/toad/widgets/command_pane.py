@@ -141,12 +141,6 @@ class CommandPane(Terminal):
             lambda: protocol, os.fdopen(master, "rb", 0)
         )
 
-        # Create write transport
-        writer_protocol = asyncio.BaseProtocol()
-        self.write_transport, _ = await loop.connect_write_pipe(
-            lambda: writer_protocol,
-            os.fdopen(os.dup(master), "wb", 0),
-        )
         unicode_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
         try:
             while True:
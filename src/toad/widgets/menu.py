@@ -7,7 +7,6 @@ from textual.app import ComposeResult
 from textual.binding import Binding
 from textual.message import Message
 from textual.widgets import ListView, ListItem, Label
-from textual._partition import partition
 from textual import events
 from textual.widget import Widget
 
@@ -39,32 +38,30 @@ class Menu(ListView, can_focus=True):
     Menu {
         margin: 1 1;
         width: auto;
-        height: auto;        
+        height: auto;
         max-width: 100%;
-        overlay: screen;  
+        overlay: screen;
         position: absolute;
         color: $foreground;
         background: $panel;
         border: block $panel;
         constrain: inside inside;
-   
-        & > MenuOption {         
-            
-            layout: horizontal;            
-            width: 1fr;            
+
+        & > MenuOption {
+            layout: horizontal;
+            width: 1fr;
             padding: 0 1;
             height: auto !important;
             overflow: auto;
-            expand: optimal;            
-            #description {                        
+            expand: optimal;
+            #description {
                 color: $text 80%;
-                width: 1fr;                    
+                width: 1fr;
             }
-            #key {                
-                padding-right: 1;                
+            #key {
+                padding-right: 1;
                 text-style: bold;
-            }                            
-           
+            }
         }
 
         &:blur {
@@ -75,7 +72,7 @@ class Menu(ListView, can_focus=True):
                 text-style: $block-cursor-blurred-text-style;
             }
         }
-        
+
         &:focus {
             background-tint: transparent;
             & > ListItem.-highlight {
@@ -103,21 +100,19 @@ class Menu(ListView, can_focus=True):
 
     def __init__(self, owner: Widget, options: list[MenuItem], *args, **kwargs) -> None:
         self._owner = owner
-        self._options = options
+        self._options = tuple(options)
         super().__init__(*args, **kwargs)
 
     def _insert_options(self) -> None:
-        with_keys, without_keys = partition(
-            lambda option: option.key is None, self._options
-        )
-        self.extend(
-            MenuOption(menu_item.action, menu_item.description, menu_item.key)
-            for menu_item in with_keys
-        )
-        self.extend(
-            MenuOption(menu_item.action, menu_item.description, menu_item.key)
-            for menu_item in without_keys
-        )
+        with_keys: list[MenuOption] = []
+        without_keys: list[MenuOption] = []
+        for menu_item in self._options:
+            key = menu_item.key
+            (without_keys if key is None else with_keys).append(
+                MenuOption(menu_item.action, menu_item.description, key)
+            )
+        # Mount in a single batch, so there is only one refresh
+        self.extend([*with_keys, *without_keys])
 
     def on_mount(self) -> None:
         self._insert_options()
@@ -133,11 +133,6 @@ class PromptTextArea(HighlightedTextArea):
     slash_commands: var[list[SlashCommand]] = var([])
     slash_command_prefixes: var[tuple[str, ...]] = var(())
 
-    class Submitted(Message):
-        def __init__(self, markdown: str) -> None:
-            self.markdown = markdown
-            super().__init__()
-
     class RequestShellMode(Message):
         pass
 
@@ -199,13 +194,14 @@ class PromptTextArea(HighlightedTextArea):
 
     def update_suggestion(self) -> None:
         prompt = self.query_ancestor(Prompt)
+        text = self.text
 
-        if self.selection.start == self.selection.end and self.text.startswith("/"):
+        if self.selection.start == self.selection.end and text.startswith("/"):
             return
 
-        if self.shell_mode and self.cursor_at_end_of_text and "\n" not in self.text:
+        if self.shell_mode and self.cursor_at_end_of_text and "\n" not in text:
             if prompt.complete_callback is not None:
-                if completes := prompt.complete_callback(self.text):
+                if completes := prompt.complete_callback(text):
                     self.suggestion = completes[-1]
 
     def check_action(self, action: str, parameters: tuple[object, ...]) -> bool | None:
@@ -227,8 +223,9 @@ class PromptTextArea(HighlightedTextArea):
                 )
             )
             return
-        self.post_message(UserInputSubmitted(self.text, self.shell_mode))
-        self.clear()
+        if text := self.text:
+            self.post_message(UserInputSubmitted(text, self.shell_mode))
+            self.clear()
 
     def action_newline(self) -> None:
         self.insert("\n")
@@ -243,12 +240,13 @@ class PromptTextArea(HighlightedTextArea):
                 )
             )
             return
+        text = self.text
         if self.suggestion:
-            if " " not in self.text:
+            if " " not in text:
                 self.insert(self.suggestion + " ")
             else:
                 prompt = self.query_ancestor(Prompt)
-                last_token = shlex.split(self.text + self.suggestion)[-1]
+                last_token = shlex.split(text + self.suggestion)[-1]
                 last_token_path = Path(prompt.working_directory) / last_token
                 if last_token_path.is_dir():
                     self.insert(self.suggestion)
@@ -256,8 +254,9 @@ class PromptTextArea(HighlightedTextArea):
                     self.insert(self.suggestion + " ")
                 self.suggestion = ""
             return
-        self.post_message(UserInputSubmitted(self.text, self.shell_mode))
-        self.clear()
+        if text:
+            self.post_message(UserInputSubmitted(text, self.shell_mode))
+            self.clear()
 
     def action_cursor_up(self, select: bool = False):
         if self.selection.is_empty and not select:
@@ -294,8 +293,9 @@ class PromptTextArea(HighlightedTextArea):
             return
 
         _cursor_row, cursor_column = prompt.prompt_text_area.selection.end
-        pre_complete = self.text[:cursor_column]
-        post_complete = self.text[cursor_column:]
+        text = self.text
+        pre_complete = text[:cursor_column]
+        post_complete = text[cursor_column:]
         shlex_tokens = shlex.split(pre_complete)
         if not shlex_tokens:
             return
@@ -598,13 +598,11 @@ class Prompt(containers.VerticalGroup):
         if self._ask is not None:
             self.question.focus()
         else:
-            self.query(HighlightedTextArea).focus()
+            self.prompt_text_area.focus()
         return self
 
     def append(self, text: str) -> None:
-        self.query_one(HighlightedTextArea).insert(
-            text, maintain_selection_offset=False
-        )
+        self.prompt_text_area.insert(text, maintain_selection_offset=False)
 
     def watch_show_path_search(self, show: bool) -> None:
         self.prompt_text_area.suggestion = ""
@@ -701,8 +699,9 @@ class Prompt(containers.VerticalGroup):
         self.set_timer(0.3, remove_question)
 
     def suggest(self, suggestion: str) -> None:
-        if suggestion.startswith(self.text) and self.text != suggestion:
-            self.prompt_text_area.suggestion = suggestion[len(self.text) :]
+        text = self.text
+        if suggestion.startswith(text) and text != suggestion:
+            self.prompt_text_area.suggestion = suggestion[len(text) :]
 
     def compose(self) -> ComposeResult:
         yield PathSearch(self.project_path).data_bind(root=Prompt.project_path)
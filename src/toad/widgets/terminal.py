@@ -12,7 +12,7 @@ from textual.message import Message
 from textual.reactive import reactive
 from textual.selection import Selection
 from textual.style import Style
-from textual.geometry import Region, Size
+from textual.geometry import Offset, Region, Size
 from textual.scroll_view import ScrollView
 from textual.strip import Strip
 from textual.timer import Timer
@@ -166,9 +166,19 @@ class Terminal(ScrollView, can_focus=True):
         Returns:
             Tuple of extracted text and ending (typically "\n" or " "), or `None` if no text could be extracted.
         """
+        lines = self.state.buffer.lines
+        start, end = selection
+        # Join only the selected lines, rather than the entire buffer
+        first_line = 0 if start is None else start.y
+        last_line = len(lines) if end is None else end.y + 1
         text = "\n".join(
-            line_record.content.plain for line_record in self.state.buffer.lines
+            line_record.content.plain for line_record in lines[first_line:last_line]
         )
+        if last_line < len(lines):
+            text += "\n"
+        if first_line:
+            shift = Offset(0, first_line)
+            selection = Selection(start - shift, None if end is None else end - shift)
         return selection.extract(text), "\n"
 
     def _on_resize(self, event: events.Resize) -> None:
@@ -201,7 +211,9 @@ class Terminal(ScrollView, can_focus=True):
                 conversation.shell.update_size(self._width, self._height)
 
         self.state.update_size(self._width, height)
-        self._terminal_render_cache.clear()
+        if self._width != old_width:
+            # Strips are cached per fold, which only change with the width
+            self._terminal_render_cache.clear()
         self.refresh()
 
     def on_mount(self) -> None:
@@ -213,7 +225,7 @@ class Terminal(ScrollView, can_focus=True):
             width, height = self._get_terminal_dimensions()
         self.update_size(width, height)
 
-    async def write(self, text: str, hide_output: bool=False) -> bool:
+    async def write(self, text: str, hide_output: bool = False) -> bool:
         """Write sequences to the terminal.
 
         Args:
@@ -267,12 +279,9 @@ class Terminal(ScrollView, can_focus=True):
             if scrollback_delta is None:
                 self.refresh(Region(0, 0, window_width, scrollback_height))
             else:
-                refresh_lines = [
-                    Region(0, y - scroll_y, window_width, 1)
-                    for y in sorted(scrollback_delta & visible_lines)
-                ]
-                if refresh_lines:
-                    self.refresh(*refresh_lines)
+                self._refresh_lines(
+                    scrollback_delta & visible_lines, scroll_y, window_width
+                )
             alternate_height = self.state.alternate_buffer.line_count
             if alternate_delta is None:
                 self.refresh(
@@ -287,12 +296,27 @@ class Terminal(ScrollView, can_focus=True):
                 alternate_delta = {
                     line_no + scrollback_height for line_no in alternate_delta
                 }
-                refresh_lines = [
-                    Region(0, y - scroll_y, window_width, 1)
-                    for y in sorted(alternate_delta & visible_lines)
-                ]
-                if refresh_lines:
-                    self.refresh(*refresh_lines)
+                self._refresh_lines(
+                    alternate_delta & visible_lines, scroll_y, window_width
+                )
+
+    def _refresh_lines(self, lines: set[int], scroll_y: int, width: int) -> None:
+        """Refresh lines, with a single region for each run of adjacent lines.
+
+        Args:
+            lines: Virtual line numbers to refresh.
+            scroll_y: Vertical scroll offset.
+            width: Width of the refreshed regions.
+        """
+        regions: list[Region] = []
+        for y in sorted(lines):
+            if regions and regions[-1].bottom == y - scroll_y:
+                region = regions[-1]
+                regions[-1] = region._replace(height=region.height + 1)
+            else:
+                regions.append(Region(0, y - scroll_y, width, 1))
+        if regions:
+            self.refresh(*regions)
 
     def render_line(self, y: int) -> Strip:
         scroll_x, scroll_y = self.scroll_offset
@@ -308,7 +332,6 @@ class Terminal(ScrollView, can_focus=True):
     def _render_line(self, x: int, y: int, width: int) -> Strip:
         selection = self.text_selection
         visual_style = self.visual_style
-        rich_style = visual_style.rich_style
 
         state = self.state
         buffer = state.scrollback_buffer
@@ -322,11 +345,11 @@ class Terminal(ScrollView, can_focus=True):
             folded_line_ = buffer.folded_lines[y - buffer_offset]
             line_no, line_offset, offset, line, updates = folded_line_
         except IndexError:
-            return Strip.blank(width, rich_style)
+            return Strip.blank(width, visual_style.rich_style)
 
         line_record = buffer.lines[line_no]
         cache_key: tuple | None = (
-            self.state.alternate_screen,
+            state.alternate_screen,
             y,
             line_record.updates,
             updates,
@@ -346,6 +369,11 @@ class Terminal(ScrollView, can_focus=True):
             )
             cache_key = None
 
+        if not line:
+            # Blank fold, so there is nothing to render or select
+            strip = Strip.blank(width, (visual_style + line_record.style).rich_style)
+            return strip.apply_offsets(x + offset, line_no)
+
         # get cached strip if there is no selection
         if (
             not selection
@@ -225,13 +225,6 @@ class TerminalTool(Terminal):
         transport, _ = await loop.connect_read_pipe(
             lambda: protocol, os.fdopen(master, "rb", 0)
         )
-        # Create write transport
-        writer_protocol = asyncio.BaseProtocol()
-        write_transport, _ = await loop.connect_write_pipe(
-            lambda: writer_protocol,
-            os.fdopen(os.dup(master), "wb", 0),
-        )
-        self.writer = write_transport
 
         unicode_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
         try:
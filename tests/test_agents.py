@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from toad import agents
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(agents, "get_cache", lambda: tmp_path)
+    agents.get_agent_validation_cache.cache_clear()
+    yield tmp_path / "agent-validation.json"
+    agents.get_agent_validation_cache.cache_clear()
+
+
+def test_validation_cache_round_trip(cache_path) -> None:
+    agents.save_agent_validation_cache(cache_path, frozenset(), {"agent.toml:1:2"})
+    previously_validated, _validated = agents.get_agent_validation_cache()
+    assert previously_validated == {"agent.toml:1:2"}
+
+
+def test_validation_cache_discarded_on_version_change(cache_path) -> None:
+    cache_path.write_text(
+        json.dumps({"version": "0.0.0:old", "validated": ["agent.toml:1:2"]})
+    )
+    previously_validated, _validated = agents.get_agent_validation_cache()
+    assert previously_validated == frozenset()
+
+
+def test_validation_cache_discarded_without_version(cache_path) -> None:
+    cache_path.write_text(json.dumps(["agent.toml:1:2"]))
+    previously_validated, _validated = agents.get_agent_validation_cache()
+    assert previously_validated == frozenset()
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from toad.ansi._ansi import TerminalState
+
+
+async def write_stdin(text: str) -> None:
+    pass
+
+
+def write(text: str) -> TerminalState:
+    """Write text to a new terminal state."""
+    state = TerminalState(write_stdin, width=40, height=12)
+
+    async def run() -> None:
+        await state.write(text)
+
+    asyncio.run(run())
+    return state
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "\x1b[2J\x1b[3;1H\x1b[0Jhi",
+        "a\nb\nc\x1b[5;1H\x1bJprompt",
+        "a\nb\nc\x1b[5;1H\x1b[J\x1b[B",
+        "a\nb\nc\x1b[5;1H\x1b[J\x1bM",
+    ],
+)
+def test_clear_to_end_below_last_line(text: str) -> None:
+    """Clearing to the end with the cursor past the last line keeps the folds consistent."""
+    buffer = write(text).buffer
+    assert buffer.folded_lines == [fold for line in buffer.lines for fold in line.folds]
+    assert buffer.line_to_fold == [
+        buffer.folded_lines.index(line.folds[0]) for line in buffer.lines
+    ]
+
+
+def test_style_after_control_code_padding() -> None:
+    """Padding a line that contains a control code keeps new spans on the new text."""
+    line = write("\x1b[31m\x07\x1b[5Cred").buffer.lines[0].content
+    assert line.plain == "     red"
+    assert [(span.start, span.end) for span in line.spans][-1] == (5, 8)